@@ -0,0 +1,167 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def install_attachment_tables(conn):
+    """Creates the side table linking daily log entries to stored photos."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS log_attachments (
+            id INTEGER PRIMARY KEY,
+            log_id INTEGER NOT NULL,
+            sha256 TEXT NOT NULL,
+            file_name TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            added_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (log_id) REFERENCES daily_log(id)
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_log_attachments_log ON log_attachments(log_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_log_attachments_sha ON log_attachments(sha256)")
+    # However a log entry is deleted (dashboard, project deletion, sync), its attachment links go with it
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS daily_log_drop_attachments AFTER DELETE ON daily_log
+        BEGIN
+            DELETE FROM log_attachments WHERE log_id = OLD.id;
+        END
+    """)
+
+
+class AttachmentStore:
+    """
+    Photo files stored outside the database, named by the SHA-256 of their content
+    (objects/ab/abcdef...). The same photo attached twice is stored once, and the
+    daily_log table never carries image data, so scanning it stays fast.
+    """
+    def __init__(self, root):
+        self.root = root
+        self.objects_dir = os.path.join(root, 'objects')
+        os.makedirs(self.objects_dir, exist_ok=True)
+
+    @classmethod
+    def for_database(cls, db_name):
+        """The store that sits next to a database file (project_manager.db -> project_manager_attachments/)."""
+        base, _ = os.path.splitext(os.path.abspath(db_name))
+        return cls(base + '_attachments')
+
+    def object_path(self, sha256):
+        return os.path.join(self.objects_dir, sha256[:2], sha256)
+
+    def add_file(self, path):
+        """Copies a file into the store unless identical content is already there. Returns (sha256, size)."""
+        digest = hashlib.sha256()
+        size = 0
+        with open(path, 'rb') as f:
+            while True:
+                chunk = f.read(HASH_CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                size += len(chunk)
+        sha256 = digest.hexdigest()
+
+        target = self.object_path(sha256)
+        if not os.path.exists(target):
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            # Copy under a temporary name and rename, so a half-written object is never visible
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(target))
+            os.close(fd)
+            try:
+                shutil.copyfile(path, temp_path)
+                os.replace(temp_path, target)
+            except OSError:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
+        return sha256, size
+
+    def stored_hashes(self):
+        for prefix in os.listdir(self.objects_dir):
+            folder = os.path.join(self.objects_dir, prefix)
+            if os.path.isdir(folder):
+                yield from (name for name in os.listdir(folder) if len(name) == 64)
+
+    def remove_unreferenced(self, conn, sha256_list=None):
+        """
+        Deletes stored objects among sha256_list (default: every stored object) that no
+        attachment row points to any more. Run it on the writer connection so no new
+        link can be committed between the check and the delete.
+        """
+        if sha256_list is None:
+            sha256_list = list(self.stored_hashes())
+        removed = 0
+        for sha256 in set(sha256_list):
+            if conn.execute("SELECT 1 FROM log_attachments WHERE sha256 = ? LIMIT 1", (sha256,)).fetchone():
+                continue
+            try:
+                os.remove(self.object_path(sha256))
+                removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+
+class ThumbnailCache:
+    """
+    Disk-backed thumbnail cache with least-recently-used eviction.
+    Recency is tracked in memory and persisted through file modification times, so the
+    LRU order survives restarts. Safe to use from several decoding threads.
+    """
+    def __init__(self, root, max_bytes=64 * 1024 * 1024, extension='.jpg'):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.extension = extension
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        os.makedirs(root, exist_ok=True)
+
+        existing = []
+        for name in os.listdir(root):
+            if name.endswith(extension):
+                stat = os.stat(os.path.join(root, name))
+                existing.append((stat.st_mtime, name[:-len(extension)], stat.st_size))
+        for _, key, size in sorted(existing):
+            self.entries[key] = size
+            self.total_bytes += size
+        self.evict()
+
+    def path(self, key):
+        return os.path.join(self.root, key + self.extension)
+
+    def lookup(self, key):
+        """Returns the cached thumbnail path and marks it as recently used, or None on a miss."""
+        with self.lock:
+            if key not in self.entries:
+                return None
+            self.entries.move_to_end(key)
+        path = self.path(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            with self.lock:
+                self.total_bytes -= self.entries.pop(key, 0)
+            return None
+        return path
+
+    def store(self, key):
+        """Registers a thumbnail just written to path(key) and evicts the oldest ones over budget."""
+        size = os.path.getsize(self.path(key))
+        with self.lock:
+            self.total_bytes += size - self.entries.pop(key, 0)
+            self.entries[key] = size
+            self.evict()
+
+    def evict(self):
+        while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+            key, size = self.entries.popitem(last=False)
+            self.total_bytes -= size
+            try:
+                os.remove(self.path(key))
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,372 @@
+import gzip
+import json
+import uuid
+
+# Tables kept in sync between site laptops. 'columns' are copied verbatim,
+# 'refs' are integer foreign keys that are translated through the referenced row's uid,
+# since local ids differ from one database file to the next.
+SYNC_TABLES = {
+    'projects': {
+        'columns': ['name', 'start_date', 'end_date', 'status'],
+        'refs': {},
+    },
+    'tasks': {
+        'columns': ['name', 'status', 'planned_start', 'planned_end', 'actual_start', 'actual_end'],
+        'refs': {'project_id': 'projects', 'prerequisite_task_id': 'tasks'},
+    },
+    'materials': {
+        'columns': ['name', 'quantity', 'unit_cost', 'alert_threshold'],
+        'refs': {'project_id': 'projects'},
+    },
+    'daily_log': {
+        'columns': ['log_date', 'description', 'hours_worked'],
+        'refs': {'project_id': 'projects'},
+    },
+}
+
+# Projects go first in a delta, so rows that reference them can be applied as they are read
+TABLE_ORDER = "CASE table_name " + " ".join(
+    f"WHEN '{table}' THEN {rank}" for rank, table in enumerate(SYNC_TABLES)
+) + " END"
+
+DELTA_FORMAT = 'ctdelta'
+DELTA_VERSION = 1
+
+# Orders concurrent versions of a row. The greatest key wins on every device,
+# which makes conflict resolution deterministic regardless of import order.
+VERSION_ORDER = "changed_at DESC, origin DESC, origin_seq DESC"
+
+LOG_CHANGE_SQL = """
+    INSERT INTO change_log (origin, origin_seq, table_name, row_uid, op, changed_at, project_id)
+    SELECT d.device_id,
+           (SELECT COALESCE(MAX(origin_seq), 0) + 1 FROM change_log WHERE origin = d.device_id),
+           '{table}', {uid}, '{op}', strftime('%Y-%m-%dT%H:%M:%fZ', 'now'), {project}
+    FROM sync_device d WHERE d.applying = 0;
+"""
+
+
+def project_column(table):
+    """The column holding a synced row's (local) project id."""
+    return 'id' if table == 'projects' else 'project_id'
+
+
+def install_change_capture(conn):
+    """Creates the change log tables and the capture triggers on every synced table."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS sync_device (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            device_id TEXT NOT NULL,
+            applying INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS change_log (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            origin TEXT NOT NULL,
+            origin_seq INTEGER NOT NULL,
+            table_name TEXT NOT NULL,
+            row_uid TEXT NOT NULL,
+            op TEXT NOT NULL,
+            changed_at TEXT NOT NULL,
+            project_id INTEGER
+        )
+    """)
+    # Local project of the changed row, so a dashboard only reacts to its own project's changes.
+    # Logs from before the column existed keep NULL there; only new entries are watched.
+    if 'project_id' not in [row[1] for row in conn.execute("PRAGMA table_info(change_log)")]:
+        conn.execute("ALTER TABLE change_log ADD COLUMN project_id INTEGER")
+        for table in SYNC_TABLES:
+            for event in ('insert', 'update', 'delete'):
+                conn.execute(f"DROP TRIGGER IF EXISTS {table}_capture_{event}")
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_change_log_origin ON change_log(origin, origin_seq)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_change_log_row ON change_log(row_uid, changed_at)")
+    # ChangeWatcher reads new entries by seq now; the old per-table index only slowed writes down
+    conn.execute("DROP INDEX IF EXISTS idx_change_log_table")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS sync_peers (
+            peer_id TEXT NOT NULL,
+            origin TEXT NOT NULL,
+            origin_seq INTEGER NOT NULL,
+            PRIMARY KEY (peer_id, origin)
+        )
+    """)
+    conn.execute("INSERT OR IGNORE INTO sync_device (id, device_id) VALUES (1, ?)", (uuid.uuid4().hex,))
+
+    for table in SYNC_TABLES:
+        columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+        if 'uid' not in columns:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN uid TEXT")
+            conn.execute(f"UPDATE {table} SET uid = lower(hex(randomblob(16))) WHERE uid IS NULL")
+            # Rows that existed before change capture are logged once, so the first sync carries them
+            conn.execute(f"""
+                INSERT INTO change_log (origin, origin_seq, table_name, row_uid, op, changed_at, project_id)
+                SELECT d.device_id,
+                       (SELECT COALESCE(MAX(origin_seq), 0) FROM change_log WHERE origin = d.device_id)
+                           + ROW_NUMBER() OVER (ORDER BY t.id),
+                       '{table}', t.uid, 'U', strftime('%Y-%m-%dT%H:%M:%fZ', 'now'), t.{project_column(table)}
+                FROM {table} t, sync_device d
+            """)
+        conn.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS idx_{table}_uid ON {table}(uid)")
+
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_capture_insert AFTER INSERT ON {table}
+            BEGIN
+                UPDATE {table} SET uid = lower(hex(randomblob(16))) WHERE id = NEW.id AND uid IS NULL;
+                {LOG_CHANGE_SQL.format(table=table, uid=f'(SELECT uid FROM {table} WHERE id = NEW.id)', op='U', project=f'NEW.{project_column(table)}')}
+            END
+        """)
+        # OLD.uid is NULL only for the uid assignment made by the insert trigger above
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_capture_update AFTER UPDATE ON {table}
+            WHEN OLD.uid IS NOT NULL
+            BEGIN
+                {LOG_CHANGE_SQL.format(table=table, uid='NEW.uid', op='U', project=f'NEW.{project_column(table)}')}
+            END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_capture_delete AFTER DELETE ON {table}
+            WHEN OLD.uid IS NOT NULL
+            BEGIN
+                {LOG_CHANGE_SQL.format(table=table, uid='OLD.uid', op='D', project=f'OLD.{project_column(table)}')}
+            END
+        """)
+
+
+class ChangeSync:
+    """
+    Moves changes between two database files through compact delta files.
+    Every change is identified by (origin device, origin sequence number); each side
+    remembers how far it has seen the other's sequences, so a delta only carries rows
+    changed since the last exchange. Concurrent edits of the same row are resolved
+    last-writer-wins on (changed_at, origin, origin_seq).
+    """
+    def __init__(self, conn):
+        self.conn = conn
+
+    @property
+    def device_id(self):
+        return self.conn.execute("SELECT device_id FROM sync_device WHERE id = 1").fetchone()[0]
+
+    def version_vector(self):
+        """Highest sequence number held locally for every origin device."""
+        return dict(self.conn.execute("SELECT origin, MAX(origin_seq) FROM change_log GROUP BY origin"))
+
+    def known_peers(self):
+        return [row[0] for row in self.conn.execute("SELECT DISTINCT peer_id FROM sync_peers ORDER BY peer_id")]
+
+    def export_delta(self, path, peer_id=None):
+        """
+        Writes every row changed since peer_id last sent us its state (everything if the
+        peer is unknown) to a gzip JSON Lines delta file. Returns the number of changes written.
+        """
+        header = {
+            'format': DELTA_FORMAT,
+            'version': DELTA_VERSION,
+            'device_id': self.device_id,
+            'vector': self.version_vector(),
+        }
+
+        cursor = self.conn.execute(f"""
+            WITH changed AS (
+                SELECT DISTINCT c.row_uid
+                FROM change_log c
+                LEFT JOIN sync_peers w ON w.peer_id = ? AND w.origin = c.origin
+                WHERE c.origin_seq > COALESCE(w.origin_seq, 0)
+            ),
+            latest AS (
+                SELECT c.table_name, c.row_uid, c.op, c.changed_at, c.origin, c.origin_seq,
+                       ROW_NUMBER() OVER (PARTITION BY c.row_uid ORDER BY {VERSION_ORDER}) AS rn
+                FROM change_log c JOIN changed USING (row_uid)
+            )
+            SELECT table_name, row_uid, op, changed_at, origin, origin_seq
+            FROM latest WHERE rn = 1
+            ORDER BY {TABLE_ORDER}, changed_at, origin, origin_seq
+        """, (peer_id,))
+
+        count = 0
+        with gzip.open(path, 'wt', encoding='utf-8') as f:
+            f.write(json.dumps(header) + "\n")
+            while True:
+                rows = cursor.fetchmany(1000)
+                if not rows:
+                    break
+                for table, row_uid, op, changed_at, origin, origin_seq in rows:
+                    change = {
+                        'table': table, 'uid': row_uid, 'op': op,
+                        'changed_at': changed_at, 'origin': origin, 'origin_seq': origin_seq,
+                    }
+                    if op == 'U':
+                        change['row'] = self.read_row(table, row_uid)
+                        if change['row'] is None:
+                            change['op'] = 'D'
+                            del change['row']
+                    f.write(json.dumps(change) + "\n")
+                    count += 1
+        return count
+
+    def read_row(self, table, row_uid):
+        """Returns a row as a dict, with foreign keys replaced by '<column>_uid' entries."""
+        spec = SYNC_TABLES[table]
+        select = [f"t.{col}" for col in spec['columns']]
+        joins = []
+        for i, (ref_col, ref_table) in enumerate(spec['refs'].items()):
+            select.append(f"r{i}.uid")
+            joins.append(f"LEFT JOIN {ref_table} r{i} ON r{i}.id = t.{ref_col}")
+
+        row = self.conn.execute(
+            f"SELECT {', '.join(select)} FROM {table} t {' '.join(joins)} WHERE t.uid = ?", (row_uid,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        names = spec['columns'] + [f"{ref_col}_uid" for ref_col in spec['refs']]
+        return dict(zip(names, row))
+
+    def import_delta(self, path):
+        """
+        Applies a delta file in one transaction. Returns (applied, skipped), where skipped
+        counts changes that lost to a newer local version or were already present.
+        """
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            header = json.loads(f.readline())
+            if header.get('format') != DELTA_FORMAT or header.get('version') != DELTA_VERSION:
+                raise ValueError(f"{path} is not a supported delta file.")
+            if header['device_id'] == self.device_id:
+                raise ValueError("This delta file was exported from this database.")
+
+            applied = skipped = 0
+            pending_prereqs = []
+            pending_parents = []
+
+            with self.conn:
+                self.conn.execute("UPDATE sync_device SET applying = 1 WHERE id = 1")
+
+                for line in f:
+                    change = json.loads(line)
+                    outcome = self.apply_change(change, pending_prereqs, pending_parents)
+                    if outcome is None:
+                        continue
+                    if outcome:
+                        applied += 1
+                    else:
+                        skipped += 1
+
+                # Rows may arrive before a newer version of their project (or from files written
+                # before deltas were ordered by table); only drop them once the whole file is in
+                for change in pending_parents:
+                    if self.apply_change(change, pending_prereqs):
+                        applied += 1
+                    else:
+                        skipped += 1
+
+                # Prerequisites may point at tasks that appeared later in the file
+                for task_uid, prereq_uid in pending_prereqs:
+                    self.conn.execute(
+                        "UPDATE tasks SET prerequisite_task_id = (SELECT id FROM tasks WHERE uid = ?) WHERE uid = ?",
+                        (prereq_uid, task_uid)
+                    )
+
+                for origin, origin_seq in header['vector'].items():
+                    self.conn.execute("""
+                        INSERT INTO sync_peers (peer_id, origin, origin_seq) VALUES (?, ?, ?)
+                        ON CONFLICT (peer_id, origin) DO UPDATE SET origin_seq = MAX(origin_seq, excluded.origin_seq)
+                    """, (header['device_id'], origin, origin_seq))
+
+                self.conn.execute("UPDATE sync_device SET applying = 0 WHERE id = 1")
+
+        return applied, skipped
+
+    def apply_change(self, change, pending_prereqs, pending_parents=None):
+        """
+        Applies one change if it is newer than the local version of its row. Returns True when
+        applied, False when skipped, and None when it was put on pending_parents to retry
+        because its project has not arrived yet.
+        """
+        table = change['table']
+        if table not in SYNC_TABLES:
+            return False
+
+        local = self.conn.execute(
+            f"SELECT changed_at, origin, origin_seq FROM change_log WHERE row_uid = ? ORDER BY {VERSION_ORDER} LIMIT 1",
+            (change['uid'],)
+        ).fetchone()
+        incoming = (change['changed_at'], change['origin'], change['origin_seq'])
+
+        # Also true for a change already recorded here, since it is one of the row's versions
+        if local is not None and tuple(local) >= incoming:
+            return False
+
+        if change['op'] == 'D':
+            project_id = self.row_project_id(table, change['uid'])
+            self.conn.execute(f"DELETE FROM {table} WHERE uid = ?", (change['uid'],))
+            self.record_change(change, project_id)
+            return True
+
+        spec = SYNC_TABLES[table]
+        row = change['row']
+        values = {col: row.get(col) for col in spec['columns']}
+
+        for ref_col, ref_table in spec['refs'].items():
+            ref_uid = row.get(f"{ref_col}_uid")
+            ref_id = None
+            if ref_uid is not None:
+                found = self.conn.execute(f"SELECT id FROM {ref_table} WHERE uid = ?", (ref_uid,)).fetchone()
+                if found:
+                    ref_id = found[0]
+                elif ref_col == 'prerequisite_task_id':
+                    pending_prereqs.append((change['uid'], ref_uid))
+            if ref_col == 'project_id' and ref_id is None:
+                if pending_parents is not None:
+                    pending_parents.append(change)
+                    return None
+                # The parent project was deleted here and that delete won; drop the orphan
+                return False
+            values[ref_col] = ref_id
+
+        if table == 'projects':
+            self.resolve_name_clash(change['uid'], values)
+
+        exists = self.conn.execute(f"SELECT 1 FROM {table} WHERE uid = ?", (change['uid'],)).fetchone()
+        if exists:
+            assignments = ", ".join(f"{col} = ?" for col in values)
+            self.conn.execute(f"UPDATE {table} SET {assignments} WHERE uid = ?", (*values.values(), change['uid']))
+        else:
+            columns = list(values) + ['uid']
+            placeholders = ", ".join("?" for _ in columns)
+            self.conn.execute(
+                f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})",
+                (*values.values(), change['uid'])
+            )
+        self.record_change(change, self.row_project_id(table, change['uid']))
+        return True
+
+    def row_project_id(self, table, row_uid):
+        found = self.conn.execute(f"SELECT {project_column(table)} FROM {table} WHERE uid = ?", (row_uid,)).fetchone()
+        return found[0] if found else None
+
+    def record_change(self, change, project_id):
+        """Adds an applied change to the local log, so later versions are compared against it and it is passed on."""
+        self.conn.execute("""
+            INSERT OR IGNORE INTO change_log (origin, origin_seq, table_name, row_uid, op, changed_at, project_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (change['origin'], change['origin_seq'], change['table'], change['uid'], change['op'],
+              change['changed_at'], project_id))
+
+    def resolve_name_clash(self, project_uid, values):
+        """
+        Project names are unique, but two laptops may create the same name offline.
+        The project with the smaller uid keeps the name and the other gets a uid suffix,
+        so both databases settle on the same names without another round trip.
+        """
+        name = values['name']
+        other = self.conn.execute(
+            "SELECT id, uid FROM projects WHERE name = ? AND uid != ?", (name, project_uid)
+        ).fetchone()
+        if other is None:
+            return
+
+        other_id, other_uid = other
+        if project_uid < other_uid:
+            self.conn.execute("UPDATE projects SET name = ? WHERE id = ?", (f"{name} [{other_uid[:6]}]", other_id))
+        else:
+            values['name'] = f"{name} [{project_uid[:6]}]"
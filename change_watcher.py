@@ -0,0 +1,63 @@
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+from schema import CHANGE_SEQUENCE_QUERY
+
+WATCHED_TABLES = ('projects', 'tasks', 'materials', 'daily_log')
+
+
+class ChangeWatcher(QObject):
+    """
+    Notices edits committed by other connections (another machine on the shared database
+    or a site API server) without reloading anything blindly.
+    Each poll is a single PRAGMA data_version, which only changes when some other connection
+    has committed. Only then are the change_log entries added since the last poll read, and
+    tables_changed emitted with the tables that actually moved. Entries for other projects
+    (when project_id is given) and entries written by own_writes, this app's WriteQueue whose
+    callers refresh themselves, are ignored.
+    """
+    tables_changed = pyqtSignal(set)
+
+    def __init__(self, conn, tables=WATCHED_TABLES, project_id=None, own_writes=None, interval_ms=1000, parent=None):
+        super().__init__(parent)
+        self.conn = conn
+        self.tables = tables
+        self.project_id = project_id
+        self.own_writes = own_writes
+        self.mark_seen()
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.poll)
+        self.timer.start(interval_ms)
+
+    def latest_seq(self):
+        return self.conn.execute(CHANGE_SEQUENCE_QUERY).fetchone()[0]
+
+    def mark_seen(self):
+        """Takes everything committed so far as the baseline. Only done at startup."""
+        self.data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        self.seen_seq = self.latest_seq()
+
+    def poll(self):
+        data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version == self.data_version:
+            return
+        self.data_version = data_version
+
+        latest = self.latest_seq()
+        query = "SELECT seq, table_name FROM change_log WHERE seq > ? AND seq <= ?"
+        params = [self.seen_seq, latest]
+        if self.project_id is not None:
+            query += " AND project_id = ?"
+            params.append(self.project_id)
+        entries = self.conn.execute(query, params).fetchall()
+        self.seen_seq = latest
+
+        changed = {
+            table for seq, table in entries
+            if table in self.tables and not (self.own_writes and self.own_writes.wrote(seq))
+        }
+        if changed:
+            self.tables_changed.emit(changed)
+
+    def stop(self):
+        self.timer.stop()
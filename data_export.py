@@ -0,0 +1,148 @@
+import csv
+import gzip
+import json
+import os
+
+EXPORT_FORMATS = {
+    'csv': '.csv',
+    'jsonl': '.jsonl',
+    'columnar': '.ctcol.gz',
+}
+
+# Columns written for each exported table, in file order
+EXPORT_TABLES = {
+    'tasks': [
+        'id', 'project_id', 'name', 'status', 'prerequisite_task_id',
+        'planned_start', 'planned_end', 'actual_start', 'actual_end'
+    ],
+    'materials': ['id', 'project_id', 'name', 'quantity', 'unit_cost', 'alert_threshold'],
+    'daily_log': ['id', 'project_id', 'log_date', 'description', 'hours_worked'],
+}
+
+REPORT_COLUMNS = [
+    'project_id', 'project_name', 'status', 'total_tasks', 'completed_tasks',
+    'completion_percent', 'total_hours', 'material_cost'
+]
+
+REPORT_METRICS_SQL = """
+SELECT p.id, p.name, p.status,
+       COALESCE(t.total_tasks, 0),
+       COALESCE(t.completed_tasks, 0),
+       CASE WHEN COALESCE(t.total_tasks, 0) > 0
+            THEN ROUND(100.0 * t.completed_tasks / t.total_tasks, 1) ELSE 0 END,
+       COALESCE(l.total_hours, 0.0),
+       COALESCE(m.material_cost, 0.0)
+FROM projects p
+LEFT JOIN (
+    SELECT project_id, COUNT(*) AS total_tasks, SUM(status = 'Complete') AS completed_tasks
+    FROM tasks{where} GROUP BY project_id
+) t ON t.project_id = p.id
+LEFT JOIN (
+    SELECT project_id, SUM(hours_worked) AS total_hours
+    FROM daily_log{where} GROUP BY project_id
+) l ON l.project_id = p.id
+LEFT JOIN (
+    SELECT project_id, SUM(quantity * unit_cost) AS material_cost
+    FROM materials{where} GROUP BY project_id
+) m ON m.project_id = p.id
+"""
+
+# Same figures as the dashboard Reports tab (FR3.3), computed for every project in one pass
+REPORT_METRICS_QUERY = REPORT_METRICS_SQL.format(where="")
+
+# The same for one project (bound as :project_id). The filter sits inside each aggregate,
+# so only that project's rows are read through the per-project indexes.
+PROJECT_REPORT_METRICS_QUERY = REPORT_METRICS_SQL.format(where=" WHERE project_id = :project_id") + "WHERE p.id = :project_id"
+
+
+class DataExporter:
+    """
+    Streams project data out of the database into flat files.
+    Rows are pulled from the cursor in chunks, so memory use stays bounded
+    by chunk_size no matter how large the project or database is.
+    """
+    def __init__(self, db_manager, chunk_size=5000):
+        self.db = db_manager
+        self.chunk_size = chunk_size
+
+    def export(self, directory, fmt='csv', project_id=None):
+        """Exports tasks, materials, daily logs and report metrics. Returns {path: row_count}."""
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format '{fmt}'. Expected one of: {', '.join(EXPORT_FORMATS)}")
+
+        os.makedirs(directory, exist_ok=True)
+        prefix = f"project_{project_id}_" if project_id is not None else ""
+        written = {}
+
+        for table, columns in EXPORT_TABLES.items():
+            query = f"SELECT {', '.join(columns)} FROM {table}"
+            params = ()
+            if project_id is not None:
+                query += " WHERE project_id = ?"
+                params = (project_id,)
+            query += " ORDER BY id"
+
+            path = os.path.join(directory, prefix + table + EXPORT_FORMATS[fmt])
+            written[path] = self.write(path, fmt, table, columns, self.db.iter_data(query, params, self.chunk_size))
+
+        if project_id is not None:
+            query, params = PROJECT_REPORT_METRICS_QUERY, {'project_id': project_id}
+        else:
+            query, params = REPORT_METRICS_QUERY + " ORDER BY p.id", ()
+
+        path = os.path.join(directory, prefix + 'report_metrics' + EXPORT_FORMATS[fmt])
+        written[path] = self.write(path, fmt, 'report_metrics', REPORT_COLUMNS, self.db.iter_data(query, params, self.chunk_size))
+
+        return written
+
+    def write(self, path, fmt, name, columns, chunks):
+        """Writes an iterable of row chunks to path in the given format. Returns the row count."""
+        if fmt == 'csv':
+            return self.write_csv(path, columns, chunks)
+        if fmt == 'jsonl':
+            return self.write_jsonl(path, columns, chunks)
+        return self.write_columnar(path, name, columns, chunks)
+
+    def write_csv(self, path, columns, chunks):
+        count = 0
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            for rows in chunks:
+                writer.writerows(rows)
+                count += len(rows)
+        return count
+
+    def write_jsonl(self, path, columns, chunks):
+        count = 0
+        with open(path, 'w', encoding='utf-8') as f:
+            for rows in chunks:
+                f.write("".join(json.dumps(dict(zip(columns, row))) + "\n" for row in rows))
+                count += len(rows)
+        return count
+
+    def write_columnar(self, path, name, columns, chunks):
+        """
+        Writes a gzip-compressed columnar file: a JSON header line followed by one
+        JSON line per row group, each holding one value array per column.
+        Storing values column by column keeps similar data together, which compresses
+        far better than row-oriented output.
+        """
+        count = 0
+        with gzip.open(path, 'wt', encoding='utf-8') as f:
+            f.write(json.dumps({'format': 'ctcol', 'version': 1, 'table': name, 'columns': columns}) + "\n")
+            for rows in chunks:
+                f.write(json.dumps({'rows': len(rows), 'data': [list(col) for col in zip(*rows)]}) + "\n")
+                count += len(rows)
+        return count
+
+
+def read_columnar(path):
+    """Yields rows back out of a file written by DataExporter.write_columnar."""
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        header = json.loads(f.readline())
+        if header.get('format') != 'ctcol':
+            raise ValueError(f"{path} is not a columnar export file.")
+        for line in f:
+            group = json.loads(line)
+            yield from zip(*group['data'])
@@ -0,0 +1,33 @@
+from datetime import datetime
+
+ISO_FORMAT = '%Y-%m-%d'
+
+# Formats accepted when cleaning up dates typed before validation existed
+LEGACY_FORMATS = (ISO_FORMAT, '%Y/%m/%d', '%Y.%m.%d', '%d/%m/%Y', '%d-%m-%Y', '%d.%m.%Y')
+
+PLACEHOLDERS = ('', 'YYYY-MM-DD')
+
+
+def normalize_date(text):
+    """
+    Returns text as a zero-padded ISO date (YYYY-MM-DD), or None when it is empty or
+    still the form placeholder. Raises ValueError for anything else.
+    ISO text sorts in date order, so range queries on indexed date columns work.
+    """
+    text = (text or '').strip()
+    if text.upper() in PLACEHOLDERS:
+        return None
+    return datetime.strptime(text, ISO_FORMAT).strftime(ISO_FORMAT)
+
+
+def parse_legacy_date(text):
+    """Best-effort conversion of an old free-text date to ISO. Returns None if it cannot be read."""
+    text = (text or '').strip()
+    if text.upper() in PLACEHOLDERS:
+        return None
+    for fmt in LEGACY_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).strftime(ISO_FORMAT)
+        except ValueError:
+            continue
+    return None
@@ -1,15 +1,40 @@
 import sys
+from startup_timing import startup_timer
 import sqlite3
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QLabel, QPushButton, QLineEdit, QFormLayout, QTableWidget,
-    QMessageBox, QTableWidgetItem
+    QMessageBox, QTableWidgetItem, QFileDialog, QInputDialog, QComboBox
 )
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QObject, QTimer, pyqtSignal
 from PyQt5.QtWidgets import QAbstractItemView 
 
 
-from project_dashboard_ui import ProjectDashboard
+# project_dashboard_ui, data_export and change_sync are imported where they are first used,
+# so launching the project list does not pay for them
+from write_queue import WriteQueue
+from project_templates import list_templates, create_project_from_template
+from date_utils import normalize_date
+from change_watcher import ChangeWatcher
+from attachments import AttachmentStore
+from schema import CHANGE_SEQUENCE_QUERY, SCHEMA_VERSION, create_tables, schema_version
+
+startup_timer.mark("imports")
+
+
+class WriteResultRelay(QObject):
+    """Carries write queue completions from the writer thread back to the GUI thread."""
+    completed = pyqtSignal(object, object, object)
+
+    def __init__(self):
+        super().__init__()
+        self.completed.connect(self.dispatch)
+
+    def dispatch(self, on_done, result, error):
+        if error is not None:
+            QMessageBox.critical(None, "Database Error", f"Operation failed: {error}")
+        elif on_done is not None:
+            on_done(result)
 
 class DatabaseManager:
     def __init__(self, db_name='project_manager.db'):
@@ -17,11 +42,21 @@ class DatabaseManager:
         self.conn = None
         self.cursor = None
         self.connect()
-        self.create_tables()
+        # Every CREATE ... IF NOT EXISTS still costs a round of schema work; skip it when nothing is missing
+        if not self.schema_is_current():
+            self.create_tables()
+
+        # UI mutations go through one background writer so they never wait on a commit
+        self.writer = WriteQueue(self.db_name, sequence_query=CHANGE_SEQUENCE_QUERY)
+        self.relay = WriteResultRelay()
+        # Daily log photos live in a folder next to the database, not inside it
+        self.attachments = AttachmentStore.for_database(self.db_name)
 
     def connect(self):
         try:
             self.conn = sqlite3.connect(self.db_name)
+            # WAL lets the GUI keep reading while the writer thread commits
+            self.conn.execute("PRAGMA journal_mode=WAL")
             self.cursor = self.conn.cursor()
         except sqlite3.Error as e:
             QMessageBox.critical(None, "Database Error", f"Connection failed: {e}")
@@ -29,50 +64,18 @@ class DatabaseManager:
 
     def create_tables(self):
         try:
-            self.cursor.execute("""
-                CREATE TABLE IF NOT EXISTS projects (
-                    id INTEGER PRIMARY KEY,
-                    name TEXT NOT NULL UNIQUE,
-                    start_date TEXT,
-                    end_date TEXT,
-                    status TEXT DEFAULT 'Active'
-                )
-            """)
-            self.cursor.execute("""
-                CREATE TABLE IF NOT EXISTS tasks (
-                    id INTEGER PRIMARY KEY,
-                    project_id INTEGER NOT NULL,
-                    name TEXT NOT NULL,
-                    status TEXT DEFAULT 'Not Started',
-                    prerequisite_task_id INTEGER,
-                    FOREIGN KEY (project_id) REFERENCES projects(id)
-                )
-            """)
-            self.cursor.execute("""
-                CREATE TABLE IF NOT EXISTS materials (
-                    id INTEGER PRIMARY KEY,
-                    project_id INTEGER NOT NULL,
-                    name TEXT NOT NULL,
-                    quantity REAL DEFAULT 0,
-                    unit_cost REAL DEFAULT 0.0,
-                    alert_threshold REAL DEFAULT 0,
-                    FOREIGN KEY (project_id) REFERENCES projects(id)
-                )
-            """)
-            self.cursor.execute("""
-                CREATE TABLE IF NOT EXISTS daily_log (
-                    id INTEGER PRIMARY KEY,
-                    project_id INTEGER NOT NULL,
-                    log_date TEXT NOT NULL,
-                    description TEXT,
-                    hours_worked REAL,
-                    FOREIGN KEY (project_id) REFERENCES projects(id)
-                )
-            """)
+            create_tables(self.conn)
             self.conn.commit()
         except sqlite3.Error as e:
             QMessageBox.critical(None, "Database Error", f"Table creation failed: {e}")
 
+    def schema_is_current(self):
+        """True when the database was already set up by this (or a newer) version of the application."""
+        try:
+            return schema_version(self.conn) >= SCHEMA_VERSION
+        except sqlite3.Error:
+            return False
+
     def execute_query(self, query, params=()):
         try:
             self.cursor.execute(query, params)
@@ -82,10 +85,53 @@ class DatabaseManager:
             QMessageBox.critical(None, "Database Error", f"Operation failed: {e}")
             return False
 
+    def submit_query(self, query, params=(), on_done=None):
+        """Queues a single write for the background writer. See submit_batch."""
+        return self.submit_batch([(query, params)], on_done)
+
+    def submit_batch(self, statements, on_done=None):
+        """
+        Queues a list of (query, params) writes that are applied atomically.
+        on_done(last_row_id) runs on the GUI thread after the commit; failures are reported
+        with the same error dialog as execute_query.
+        """
+        return self.track(self.writer.submit(statements), on_done)
+
+    def track(self, future, on_done):
+        """Forwards a writer Future's outcome to the GUI thread."""
+        def finished(f):
+            error = f.exception()
+            self.relay.completed.emit(on_done, None if error else f.result(), error)
+
+        future.add_done_callback(finished)
+        return future
+
+    def submit_call(self, func, on_done=None):
+        """Queues func(conn) to run atomically on the writer connection. See submit_batch."""
+        return self.track(self.writer.submit_call(func), on_done)
+
+    def close(self):
+        """Flushes queued writes and closes the database."""
+        self.writer.close()
+        self.conn.close()
+
     def fetch_data(self, query, params=()):
         self.cursor.execute(query, params)
         return self.cursor.fetchall()
 
+    def iter_data(self, query, params=(), chunk_size=1000):
+        """Yields query results in chunks instead of materializing them with fetchall()."""
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            cursor.close()
+
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -94,6 +140,7 @@ class MainWindow(QMainWindow):
         self.dashboard_window = None 
 
         self.db = DatabaseManager()
+        startup_timer.mark("db_open")
 
         self.central_widget = QWidget()
         self.setCentralWidget(self.central_widget)
@@ -102,6 +149,13 @@ class MainWindow(QMainWindow):
         self.setup_project_selection_ui()
         
         self.load_project_data()
+        self.load_templates()
+
+        # Keep the project list current when other machines add or remove projects
+        self.watcher = ChangeWatcher(self.db.conn, tables=('projects',), own_writes=self.db.writer, parent=self)
+        self.watcher.tables_changed.connect(lambda _: self.load_project_data())
+        startup_timer.mark("main_window")
+        self.first_paint_seen = False
 
     def setup_project_selection_ui(self):
         creation_widget = QWidget()
@@ -116,13 +170,19 @@ class MainWindow(QMainWindow):
         creation_form = QFormLayout()
 
         self.new_project_name = QLineEdit()
-        self.new_project_start = QLineEdit("YYYY-MM-DD")
-        self.new_project_end = QLineEdit("YYYY-MM-DD")
+        self.new_project_start = QLineEdit()
+        self.new_project_start.setPlaceholderText("YYYY-MM-DD")
+        self.new_project_end = QLineEdit()
+        self.new_project_end.setPlaceholderText("YYYY-MM-DD")
 
         creation_form.addRow("Project Name:", self.new_project_name)
         creation_form.addRow("Start Date:", self.new_project_start)
         creation_form.addRow("Est. End Date:", self.new_project_end)
 
+        self.new_project_template = QComboBox()
+        self.new_project_template.setToolTip("Template tasks get planned dates only when a Start Date is entered")
+        creation_form.addRow("Template:", self.new_project_template)
+
         creation_layout.addLayout(creation_form)
 
         create_btn = QPushButton("Create Project & Start")
@@ -182,10 +242,53 @@ class MainWindow(QMainWindow):
         """)
         self.delete_btn.clicked.connect(self.delete_project)
 
+        self.export_btn = QPushButton("Export All Projects")
+        self.export_btn.setStyleSheet("""
+            padding: 8px; 
+            background-color: #666666; 
+            color: white; 
+            font-weight: bold; 
+            border: 1px solid #666666;
+            border-radius: 5px;
+        """)
+        self.export_btn.clicked.connect(self.export_data)
+
         button_group.addWidget(self.select_btn)
         button_group.addWidget(self.delete_btn)
+        button_group.addWidget(self.export_btn)
 
         selection_layout.addLayout(button_group)
+
+        # Offline sync between site laptops
+
+        sync_group = QHBoxLayout()
+
+        self.sync_export_btn = QPushButton("Export Sync Delta")
+        self.sync_export_btn.setStyleSheet("""
+            padding: 8px; 
+            background-color: #674ea7; 
+            color: white; 
+            font-weight: bold; 
+            border: 1px solid #674ea7;
+            border-radius: 5px;
+        """)
+        self.sync_export_btn.clicked.connect(self.export_sync_delta)
+
+        self.sync_import_btn = QPushButton("Import Sync Delta")
+        self.sync_import_btn.setStyleSheet("""
+            padding: 8px; 
+            background-color: #674ea7; 
+            color: white; 
+            font-weight: bold; 
+            border: 1px solid #674ea7;
+            border-radius: 5px;
+        """)
+        self.sync_import_btn.clicked.connect(self.import_sync_delta)
+
+        sync_group.addWidget(self.sync_export_btn)
+        sync_group.addWidget(self.sync_import_btn)
+
+        selection_layout.addLayout(sync_group)
  
         
 
@@ -201,12 +304,35 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Input Error", "Project Name cannot be empty.")
             return
 
-        query = "INSERT INTO projects (name, start_date, end_date) VALUES (?, ?, ?)"
-        
-        if self.db.execute_query(query, (name, start, end)):
+        try:
+            start = normalize_date(start)
+            end = normalize_date(end)
+        except ValueError:
+            QMessageBox.warning(self, "Input Error", "Start and End Date must be in YYYY-MM-DD format (or left empty).")
+            return
+
+        if start and end and end < start:
+            QMessageBox.warning(self, "Input Error", "Est. End Date cannot be before the Start Date.")
+            return
+
+        template_id = self.new_project_template.currentData()
+
+        def project_created(_):
             QMessageBox.information(self, "Success", f"Project '{name}' created successfully.")
             self.new_project_name.clear()
-            self.load_project_data() 
+            self.new_project_start.clear()
+            self.new_project_end.clear()
+            self.load_project_data()
+
+        if template_id is None:
+            query = "INSERT INTO projects (name, start_date, end_date) VALUES (?, ?, ?)"
+            self.db.submit_query(query, (name, start, end), on_done=project_created)
+        else:
+            # Project, tasks and materials are created together in one transaction
+            self.db.submit_call(
+                lambda conn: create_project_from_template(conn, template_id, name, start, end),
+                on_done=project_created
+            )
 
     def delete_project(self):
         selected_rows = self.project_table.selectionModel().selectedRows()
@@ -236,21 +362,87 @@ class MainWindow(QMainWindow):
             return
 
 
-        # Perform cascading deletion to maintain database integrity
-        
-        
-        self.db.execute_query("DELETE FROM tasks WHERE project_id = ?", (project_id,))
-        
-        self.db.execute_query("DELETE FROM materials WHERE project_id = ?", (project_id,))
-        
-        self.db.execute_query("DELETE FROM daily_log WHERE project_id = ?", (project_id,))
-        
-        
-        if self.db.execute_query("DELETE FROM projects WHERE id = ?", (project_id,)):
+        # Perform cascading deletion to maintain database integrity (one transaction)
+
+        photo_hashes = [row[0] for row in self.db.fetch_data("""
+            SELECT DISTINCT a.sha256 FROM log_attachments a
+            JOIN daily_log l ON l.id = a.log_id
+            WHERE l.project_id = ?
+        """, (project_id,))]
+
+        def project_deleted(_):
             QMessageBox.information(self, "Success", f"Project '{project_name}' and all related data have been permanently deleted.")
             self.load_project_data()
-        else:
-            QMessageBox.critical(self, "Error", f"Failed to delete project '{project_name}'. Please check the console for database errors.")
+            # Log entries took their photo links with them; drop the project's photos nothing else uses
+            if photo_hashes:
+                self.db.submit_call(lambda conn: self.db.attachments.remove_unreferenced(conn, photo_hashes))
+
+        self.db.submit_batch([
+            ("DELETE FROM tasks WHERE project_id = ?", (project_id,)),
+            ("DELETE FROM materials WHERE project_id = ?", (project_id,)),
+            ("DELETE FROM daily_log WHERE project_id = ?", (project_id,)),
+            ("DELETE FROM projects WHERE id = ?", (project_id,)),
+        ], on_done=project_deleted)
+
+    def export_data(self):
+        """Exports every project's tasks, materials, logs and report metrics to a folder."""
+        from data_export import DataExporter, EXPORT_FORMATS
+        fmt, ok = QInputDialog.getItem(self, "Export Format", "Choose an export format:", list(EXPORT_FORMATS), 0, False)
+        if not ok:
+            return
+
+        directory = QFileDialog.getExistingDirectory(self, "Choose Export Folder")
+        if not directory:
+            return
+
+        try:
+            written = DataExporter(self.db).export(directory, fmt)
+        except (OSError, sqlite3.Error) as e:
+            QMessageBox.critical(self, "Export Error", f"Export failed: {e}")
+            return
+
+        total_rows = sum(written.values())
+        QMessageBox.information(self, "Export Complete", f"Exported {total_rows} rows into {len(written)} files in {directory}.")
+
+    def export_sync_delta(self):
+        """Writes the changes another laptop has not seen yet to a delta file."""
+        from change_sync import ChangeSync
+        sync = ChangeSync(self.db.conn)
+        full_export = "New device (all changes)"
+        peers = sync.known_peers()
+
+        peer, ok = QInputDialog.getItem(self, "Export Sync Delta", "Export changes for device:", [full_export] + peers, 0, False)
+        if not ok:
+            return
+        peer_id = None if peer == full_export else peer
+
+        path, _ = QFileDialog.getSaveFileName(self, "Save Sync Delta", f"delta_{sync.device_id[:8]}.ctdelta", "Sync Delta (*.ctdelta)")
+        if not path:
+            return
+
+        try:
+            count = sync.export_delta(path, peer_id)
+        except (OSError, sqlite3.Error) as e:
+            QMessageBox.critical(self, "Sync Error", f"Export failed: {e}")
+            return
+
+        QMessageBox.information(self, "Sync", f"Exported {count} changed rows to {path}.")
+
+    def import_sync_delta(self):
+        """Applies a delta file exported from another laptop."""
+        from change_sync import ChangeSync
+        path, _ = QFileDialog.getOpenFileName(self, "Open Sync Delta", "", "Sync Delta (*.ctdelta)")
+        if not path:
+            return
+
+        try:
+            applied, skipped = ChangeSync(self.db.conn).import_delta(path)
+        except (OSError, ValueError, KeyError, sqlite3.Error) as e:
+            QMessageBox.critical(self, "Sync Error", f"Import failed: {e}")
+            return
+
+        QMessageBox.information(self, "Sync", f"Applied {applied} changes ({skipped} already present or superseded).")
+        self.load_project_data()
 
     def load_project_data(self):
         projects = self.db.fetch_data("SELECT id, name, start_date, status FROM projects ORDER BY id DESC")
@@ -263,6 +455,13 @@ class MainWindow(QMainWindow):
             self.project_table.setItem(row, 2, QTableWidgetItem(start_date))
             self.project_table.setItem(row, 3, QTableWidgetItem(status))
 
+    def load_templates(self):
+        """Fills the template selector of the project creation form."""
+        self.new_project_template.clear()
+        self.new_project_template.addItem("None (empty project)", None)
+        for template_id, name, task_count in list_templates(self.db.conn):
+            self.new_project_template.addItem(f"{name} ({task_count} tasks)", template_id)
+
     def open_project(self):
         selected_rows = self.project_table.selectionModel().selectedRows()
         
@@ -280,15 +479,37 @@ class MainWindow(QMainWindow):
             project_name = project_name_item.text()
 
             self.hide()
-            
+
+            from project_dashboard_ui import ProjectDashboard
             self.dashboard_window = ProjectDashboard(project_id, project_name, self.db)
             
             self.dashboard_window.finished.connect(self.show)
             
             self.dashboard_window.exec_()
+
+            # The dashboard may have saved new templates or changed the project's status
+            self.load_templates()
+            self.load_project_data()
         else:
             QMessageBox.critical(self, "Data Error", "Could not retrieve project ID and Name.")
 
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self.first_paint_seen:
+            self.first_paint_seen = True
+            # Child widgets paint in the same pass; the timer fires once the whole frame is done
+            QTimer.singleShot(0, self.first_paint_done)
+
+    def first_paint_done(self):
+        startup_timer.mark("first_paint")
+        if startup_timer.enabled():
+            startup_timer.report()
+
+    def closeEvent(self, event):
+        self.watcher.stop()
+        self.db.close()
+        event.accept()
+
 
 if __name__ == '__main__':
     if not QApplication.instance():
@@ -296,6 +517,8 @@ if __name__ == '__main__':
     else:
         app = QApplication.instance()
         
+    startup_timer.mark("qt_app")
+        
     window = MainWindow()
     window.show()
     sys.exit(app.exec_())
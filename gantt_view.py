@@ -0,0 +1,244 @@
+import math
+from array import array
+from datetime import date
+
+from PyQt5.QtWidgets import QGraphicsView, QGraphicsScene, QGraphicsItem
+from PyQt5.QtCore import Qt, QRectF, QPointF, QLineF
+from PyQt5.QtGui import QPainter, QColor, QPen, QBrush
+
+DAY_WIDTH = 12.0
+ROW_HEIGHT = 20.0
+BAR_MARGIN = 4.0
+
+# Below this many screen pixels per row, neighbouring rows are drawn as one aggregated bar
+MIN_ROW_PIXELS = 3.0
+# Dependency arrows and task names only appear once rows are comfortably readable
+ARROW_ROW_PIXELS = 8.0
+LABEL_ROW_PIXELS = 14.0
+# Room kept right of the latest bar for task names; longer names are elided to fit
+LABEL_WIDTH = 240.0
+
+STATUS_COLORS = (QColor('#cc0000'), QColor('#e69138'), QColor('#38761d'))
+AGGREGATE_COLOR = QColor('#6fa8dc')
+ACTUAL_COLOR = QColor(0, 0, 0, 110)
+ARROW_COLOR = QColor('#666666')
+GRID_COLOR = QColor('#e0e0e0')
+TODAY_COLOR = QColor('#0b5394')
+
+
+class GanttChartItem(QGraphicsItem):
+    """
+    The whole schedule as one graphics item that paints only what is exposed.
+    With 20,000+ tasks, one QGraphicsItem per bar makes every pan and zoom walk the
+    scene index; here paint() turns the exposed rectangle straight into a row range,
+    so the cost of a frame depends on the viewport size, not on the number of tasks.
+    Zoomed far out, rows are read from precomputed min/max pyramids and drawn as
+    aggregated bars, one per few screen pixels.
+    """
+    def __init__(self):
+        super().__init__()
+        self.setFlag(QGraphicsItem.ItemUsesExtendedStyleOption)
+        self.set_rows([], array('l'), array('l'), array('l'), array('l'), array('b'), array('l'))
+
+    def set_rows(self, names, starts, ends, actual_starts, actual_ends, statuses, prereq_rows):
+        """
+        Takes one entry per chart row, already in display order. Dates are day numbers
+        (0 = unset) and prereq_rows holds the row of each task's prerequisite, or -1.
+        """
+        self.prepareGeometryChange()
+        self.names = names
+        self.starts = starts
+        self.ends = ends
+        self.actual_starts = actual_starts
+        self.actual_ends = actual_ends
+        self.statuses = statuses
+        self.prereq_rows = prereq_rows
+
+        # Each row paints from the earlier of its planned and actual start to the later of its
+        # planned and actual end; a task still in progress runs its actual bar up to today
+        today = date.today().toordinal()
+        self.span_starts = array('l', (
+            min(start, actual) if actual else start for start, actual in zip(starts, actual_starts)
+        ))
+        self.span_ends = array('l', (
+            max(end, actual_end or today) if actual_start else end
+            for end, actual_start, actual_end in zip(ends, actual_starts, actual_ends)
+        ))
+
+        self.first_day = min(self.span_starts) if starts else today
+        last_day = max(self.span_ends) if starts else self.first_day
+        self.width = (last_day - self.first_day + 1) * DAY_WIDTH + LABEL_WIDTH
+        self.height = len(starts) * ROW_HEIGHT
+        self.build_pyramid()
+        self.update()
+
+    def build_pyramid(self):
+        """levels[k] holds (min span start, max span end) for consecutive groups of 2**(k+1) rows."""
+        self.levels = []
+        starts, ends = self.span_starts, self.span_ends
+        while len(starts) > 1:
+            starts = array('l', (min(starts[i:i + 2]) for i in range(0, len(starts), 2)))
+            ends = array('l', (max(ends[i:i + 2]) for i in range(0, len(ends), 2)))
+            self.levels.append((starts, ends))
+
+    def boundingRect(self):
+        return QRectF(0, 0, max(self.width, DAY_WIDTH), max(self.height, ROW_HEIGHT))
+
+    def day_x(self, day):
+        return (day - self.first_day) * DAY_WIDTH
+
+    def paint(self, painter, option, widget=None):
+        exposed = option.exposedRect
+        transform = painter.worldTransform()
+        row_pixels = ROW_HEIGHT * abs(transform.m22())
+        day_pixels = DAY_WIDTH * abs(transform.m11())
+
+        self.paint_grid(painter, exposed, day_pixels)
+        if not self.starts:
+            return
+
+        first_row = max(0, int(exposed.top() // ROW_HEIGHT))
+        last_row = min(len(self.starts), int(exposed.bottom() // ROW_HEIGHT) + 1)
+        if first_row >= last_row:
+            return
+
+        if row_pixels < MIN_ROW_PIXELS and self.levels:
+            self.paint_aggregated(painter, exposed, first_row, last_row, row_pixels)
+            return
+
+        self.paint_bars(painter, exposed, first_row, last_row, row_pixels)
+        if row_pixels >= ARROW_ROW_PIXELS:
+            self.paint_arrows(painter, first_row, last_row)
+
+    def paint_grid(self, painter, exposed, day_pixels):
+        """Month lines (or year lines when zoomed out) and a marker for today."""
+        first_day = self.first_day + max(0, int(exposed.left() // DAY_WIDTH))
+        last_day = self.first_day + int(exposed.right() // DAY_WIDTH) + 1
+        yearly = day_pixels * 30 < 6
+
+        painter.setPen(QPen(GRID_COLOR, 0))
+        current = date.fromordinal(max(1, first_day)).replace(day=1)
+        while current.toordinal() <= last_day:
+            if not yearly or current.month == 1:
+                x = self.day_x(current.toordinal())
+                painter.drawLine(QLineF(x, exposed.top(), x, exposed.bottom()))
+            current = date(current.year + current.month // 12, current.month % 12 + 1, 1)
+
+        today_x = self.day_x(date.today().toordinal())
+        if exposed.left() <= today_x <= exposed.right():
+            painter.setPen(QPen(TODAY_COLOR, 0, Qt.DashLine))
+            painter.drawLine(QLineF(today_x, exposed.top(), today_x, exposed.bottom()))
+
+    def paint_bars(self, painter, exposed, first_row, last_row, row_pixels):
+        left_day = self.first_day + exposed.left() / DAY_WIDTH - 1
+        right_day = self.first_day + exposed.right() / DAY_WIDTH + 1
+        bar_height = ROW_HEIGHT - 2 * BAR_MARGIN
+        show_labels = row_pixels >= LABEL_ROW_PIXELS
+
+        painter.setPen(Qt.NoPen)
+        for row in range(first_row, last_row):
+            if self.span_ends[row] < left_day or self.span_starts[row] > right_day:
+                continue
+            start, end = self.starts[row], self.ends[row]
+            y = row * ROW_HEIGHT
+            x = self.day_x(start)
+            painter.setBrush(STATUS_COLORS[self.statuses[row]])
+            painter.drawRect(QRectF(x, y + BAR_MARGIN, (end - start + 1) * DAY_WIDTH, bar_height))
+
+            if self.actual_starts[row]:
+                actual_end = self.actual_ends[row] or date.today().toordinal()
+                actual_x = self.day_x(self.actual_starts[row])
+                painter.setBrush(ACTUAL_COLOR)
+                painter.drawRect(QRectF(
+                    actual_x, y + ROW_HEIGHT / 2,
+                    (actual_end - self.actual_starts[row] + 1) * DAY_WIDTH, bar_height / 2
+                ))
+
+        if show_labels:
+            painter.setPen(QPen(Qt.black))
+            metrics = painter.fontMetrics()
+            for row in range(first_row, last_row):
+                x = self.day_x(self.span_ends[row] + 1) + 4
+                if x > exposed.right():
+                    continue
+                # Never paint past the item's bounding rect
+                name = metrics.elidedText(self.names[row], Qt.ElideRight, int(self.width - x))
+                painter.drawText(QPointF(x, row * ROW_HEIGHT + ROW_HEIGHT - BAR_MARGIN - 2), name)
+
+    def paint_aggregated(self, painter, exposed, first_row, last_row, row_pixels):
+        """Draws one bar per group of rows spanning the group's earliest start to latest end."""
+        level = min(len(self.levels) - 1, max(0, math.ceil(math.log2(MIN_ROW_PIXELS / row_pixels)) - 1))
+        starts, ends = self.levels[level]
+        group = 2 ** (level + 1)
+        group_height = group * ROW_HEIGHT
+
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(AGGREGATE_COLOR)
+        for index in range(first_row // group, min(len(starts), last_row // group + 1)):
+            x = self.day_x(starts[index])
+            painter.drawRect(QRectF(x, index * group_height, (ends[index] - starts[index] + 1) * DAY_WIDTH, group_height))
+
+    def paint_arrows(self, painter, first_row, last_row):
+        """Finish-to-start arrows into every visible task from its prerequisite."""
+        painter.setPen(QPen(ARROW_COLOR, 0))
+        for row in range(first_row, last_row):
+            prereq_row = self.prereq_rows[row]
+            if prereq_row < 0:
+                continue
+            x1 = self.day_x(self.ends[prereq_row] + 1)
+            y1 = prereq_row * ROW_HEIGHT + ROW_HEIGHT / 2
+            x2 = self.day_x(self.starts[row])
+            y2 = row * ROW_HEIGHT + ROW_HEIGHT / 2
+            elbow = QPointF(x1 + DAY_WIDTH / 2, y2)
+            painter.drawLine(QLineF(QPointF(x1, y1), QPointF(elbow.x(), y1)))
+            painter.drawLine(QLineF(QPointF(elbow.x(), y1), elbow))
+            painter.drawLine(QLineF(elbow, QPointF(x2, y2)))
+            painter.drawLine(QLineF(x2, y2, x2 - 4, y2 - 3))
+            painter.drawLine(QLineF(x2, y2, x2 - 4, y2 + 3))
+
+
+class GanttView(QGraphicsView):
+    """
+    Scrollable, zoomable Gantt chart of a ProjectSnapshot.
+    Mouse wheel zooms in and out; Ctrl + wheel zooms only the time axis; drag to pan.
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.chart = GanttChartItem()
+        scene = QGraphicsScene(self)
+        scene.setItemIndexMethod(QGraphicsScene.NoIndex)
+        scene.addItem(self.chart)
+        self.setScene(scene)
+
+        self.setDragMode(QGraphicsView.ScrollHandDrag)
+        self.setViewportUpdateMode(QGraphicsView.MinimalViewportUpdate)
+        self.setOptimizationFlags(QGraphicsView.DontSavePainterState)
+        self.setTransformationAnchor(QGraphicsView.AnchorUnderMouse)
+        self.setRenderHint(QPainter.Antialiasing, False)
+        self.setBackgroundBrush(QBrush(Qt.white))
+
+    def load_snapshot(self, snapshot):
+        """Rebuilds the chart rows from the snapshot's tasks that have planned dates, ordered by start."""
+        tasks = snapshot.tasks
+        scheduled = [pos for pos in range(len(tasks)) if tasks.planned_start[pos] and tasks.planned_end[pos]]
+        scheduled.sort(key=lambda pos: (tasks.planned_start[pos], tasks.planned_end[pos], tasks.ids[pos]))
+
+        row_of_task = {tasks.ids[pos]: row for row, pos in enumerate(scheduled)}
+        self.chart.set_rows(
+            [tasks.names[pos] for pos in scheduled],
+            array('l', (tasks.planned_start[pos] for pos in scheduled)),
+            array('l', (max(tasks.planned_start[pos], tasks.planned_end[pos]) for pos in scheduled)),
+            array('l', (tasks.actual_start[pos] for pos in scheduled)),
+            array('l', (tasks.actual_end[pos] for pos in scheduled)),
+            array('b', (tasks.statuses[pos] for pos in scheduled)),
+            array('l', (row_of_task.get(tasks.prereq_ids[pos], -1) for pos in scheduled)),
+        )
+        self.scene().setSceneRect(self.chart.boundingRect())
+
+    def wheelEvent(self, event):
+        factor = 1.2 ** (event.angleDelta().y() / 120)
+        if event.modifiers() & Qt.ControlModifier:
+            self.scale(factor, 1.0)
+        else:
+            self.scale(factor, factor)
+        event.accept()
@@ -0,0 +1,148 @@
+# Monday of the ISO week a log date falls in. Unreadable legacy dates are kept as they are
+# rather than losing the hours.
+WEEK_OF = "COALESCE(date({0}, '-6 days', 'weekday 1'), {0})"
+
+# Adds (sign = '+') or removes (sign = '-') allocation rows in `source` from labour_rollup
+ROLLUP_APPLY_SQL = """
+    INSERT INTO labour_rollup (project_id, task_id, crew_id, week, trade_id, hours)
+    SELECT l.project_id, a.task_id, a.crew_id, {week}, c.trade_id, {sign}SUM(a.hours)
+    FROM {source} a
+    JOIN daily_log l ON l.id = a.log_id
+    LEFT JOIN crews c ON c.id = a.crew_id
+    WHERE {where}
+    GROUP BY l.project_id, a.task_id, a.crew_id, {week}
+    ON CONFLICT (project_id, task_id, crew_id, week) DO UPDATE SET hours = hours + excluded.hours;
+"""
+
+# Rows whose hours have netted out to zero are dropped so the rollup only holds real work
+ROLLUP_PRUNE_SQL = "DELETE FROM labour_rollup WHERE abs(hours) < 1e-9;"
+
+# Hours per task, crew, trade or week for one project, read from the rollup rather than the allocations
+LABOUR_BREAKDOWN_QUERIES = {
+    'Task': """
+        SELECT COALESCE(t.name, 'Task #' || r.task_id), SUM(r.hours)
+        FROM labour_rollup r LEFT JOIN tasks t ON t.id = r.task_id
+        WHERE r.project_id = ? GROUP BY r.task_id ORDER BY 2 DESC
+    """,
+    'Crew': """
+        SELECT COALESCE(c.name, 'Crew #' || r.crew_id), SUM(r.hours)
+        FROM labour_rollup r LEFT JOIN crews c ON c.id = r.crew_id
+        WHERE r.project_id = ? GROUP BY r.crew_id ORDER BY 2 DESC
+    """,
+    'Trade': """
+        SELECT COALESCE(tr.name, 'No Trade'), SUM(r.hours)
+        FROM labour_rollup r LEFT JOIN trades tr ON tr.id = r.trade_id
+        WHERE r.project_id = ? GROUP BY r.trade_id ORDER BY 2 DESC
+    """,
+    'Week': """
+        SELECT 'Week of ' || r.week, SUM(r.hours)
+        FROM labour_rollup r
+        WHERE r.project_id = ? GROUP BY r.week ORDER BY r.week DESC
+    """,
+}
+
+
+def install_labour_tables(conn):
+    """
+    Creates trades, crews and per-task hour allocations on log entries, plus labour_rollup:
+    hours summed per (project, task, crew, week), kept current by triggers so report
+    breakdowns read a few pre-aggregated rows instead of rescanning every allocation.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS trades (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS crews (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE,
+            trade_id INTEGER,
+            FOREIGN KEY (trade_id) REFERENCES trades(id)
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS log_allocations (
+            id INTEGER PRIMARY KEY,
+            log_id INTEGER NOT NULL,
+            task_id INTEGER NOT NULL,
+            crew_id INTEGER NOT NULL,
+            hours REAL NOT NULL,
+            FOREIGN KEY (log_id) REFERENCES daily_log(id),
+            FOREIGN KEY (task_id) REFERENCES tasks(id),
+            FOREIGN KEY (crew_id) REFERENCES crews(id)
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_log_allocations_log ON log_allocations(log_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_log_allocations_task ON log_allocations(task_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_log_allocations_crew ON log_allocations(crew_id)")
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS labour_rollup (
+            project_id INTEGER NOT NULL,
+            task_id INTEGER NOT NULL,
+            crew_id INTEGER NOT NULL,
+            week TEXT NOT NULL,
+            trade_id INTEGER,
+            hours REAL NOT NULL,
+            PRIMARY KEY (project_id, task_id, crew_id, week)
+        ) WITHOUT ROWID
+    """)
+    # Each breakdown is a covering index scan over one project's rows
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_labour_rollup_crew ON labour_rollup(project_id, crew_id, hours)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_labour_rollup_trade ON labour_rollup(project_id, trade_id, hours)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_labour_rollup_week ON labour_rollup(project_id, week, hours)")
+
+    def rollup(sign, source, where, date_column='l.log_date'):
+        sql = ROLLUP_APPLY_SQL.format(sign=sign, source=source, where=where, week=WEEK_OF.format(date_column))
+        return sql + (ROLLUP_PRUNE_SQL if sign == '-' else '')
+
+    triggers = {
+        'log_allocations_rollup_insert': f"""
+            AFTER INSERT ON log_allocations BEGIN
+                {rollup('+', 'log_allocations', 'a.id = NEW.id')}
+            END""",
+        'log_allocations_rollup_delete': f"""
+            AFTER DELETE ON log_allocations BEGIN
+                {rollup('-', '(SELECT OLD.log_id AS log_id, OLD.task_id AS task_id, OLD.crew_id AS crew_id, OLD.hours AS hours)', '1')}
+            END""",
+        'log_allocations_rollup_update': f"""
+            AFTER UPDATE ON log_allocations BEGIN
+                {rollup('-', '(SELECT OLD.log_id AS log_id, OLD.task_id AS task_id, OLD.crew_id AS crew_id, OLD.hours AS hours)', '1')}
+                {rollup('+', 'log_allocations', 'a.id = NEW.id')}
+            END""",
+        # A log entry moved to another date or project moves its hours to another rollup row.
+        # The old key is rebuilt from OLD values because daily_log already holds the new ones.
+        'daily_log_rollup_update': f"""
+            AFTER UPDATE OF log_date, project_id ON daily_log BEGIN
+                INSERT INTO labour_rollup (project_id, task_id, crew_id, week, trade_id, hours)
+                SELECT OLD.project_id, a.task_id, a.crew_id, {WEEK_OF.format('OLD.log_date')}, c.trade_id, -SUM(a.hours)
+                FROM log_allocations a LEFT JOIN crews c ON c.id = a.crew_id
+                WHERE a.log_id = OLD.id
+                GROUP BY a.task_id, a.crew_id
+                ON CONFLICT (project_id, task_id, crew_id, week) DO UPDATE SET hours = hours + excluded.hours;
+                {ROLLUP_PRUNE_SQL}
+                {rollup('+', 'log_allocations', 'a.log_id = NEW.id')}
+            END""",
+        # Allocations go before their log entry or task, while daily_log still has the row to key them by
+        'daily_log_drop_allocations': """
+            BEFORE DELETE ON daily_log BEGIN
+                DELETE FROM log_allocations WHERE log_id = OLD.id;
+            END""",
+        'tasks_drop_allocations': """
+            BEFORE DELETE ON tasks BEGIN
+                DELETE FROM log_allocations WHERE task_id = OLD.id;
+            END""",
+        'crews_rollup_trade': """
+            AFTER UPDATE OF trade_id ON crews BEGIN
+                UPDATE labour_rollup SET trade_id = NEW.trade_id WHERE crew_id = NEW.id;
+            END""",
+    }
+    for name, body in triggers.items():
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+
+
+def labour_breakdown(conn, project_id, by):
+    """Returns [(label, hours)] for one project grouped by 'Task', 'Crew', 'Trade' or 'Week'."""
+    return conn.execute(LABOUR_BREAKDOWN_QUERIES[by], (project_id,)).fetchall()
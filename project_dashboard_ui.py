@@ -3,10 +3,39 @@ from PyQt5.QtWidgets import (
     QDialog, QTabWidget, QWidget, QVBoxLayout, QHBoxLayout, 
     QLabel, QTableWidget, QPushButton, QFormLayout, QLineEdit,
     QTableWidgetItem, QComboBox, QMessageBox, QTextEdit, QHeaderView,
-    QAbstractItemView
+    QAbstractItemView, QFileDialog, QInputDialog, QDateEdit,
+    QListWidget, QListWidgetItem, QListView
 )
-from PyQt5.QtCore import Qt, QDate
-from datetime import datetime
+from PyQt5.QtCore import Qt, QDate, QSize, QTimer, QUrl
+from PyQt5.QtGui import QColor, QIcon, QPixmap, QDesktopServices
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from data_export import DataExporter, EXPORT_FORMATS
+from project_templates import save_project_as_template
+from project_snapshot import ProjectSnapshot, iso_date
+from date_utils import normalize_date
+from change_watcher import ChangeWatcher
+from gantt_view import GanttView
+from thumbnail_loader import ThumbnailLoader, THUMBNAIL_SIZE
+from task_status import PREREQUISITE_VIOLATIONS_QUERY, SET_STATUS_QUERY
+from labour import LABOUR_BREAKDOWN_QUERIES, labour_breakdown
+
+PHOTO_FILE_FILTER = "Images (*.jpg *.jpeg *.png *.bmp *.gif *.tif *.tiff);;All Files (*)"
+
+# Daily Log history filters: label -> days back from today (None = no limit)
+LOG_RANGE_PRESETS = {
+    "All Dates": None,
+    "Last 2 Weeks": 14,
+    "Last 30 Days": 30,
+    "Last 90 Days": 90,
+    "Last 12 Months": 365,
+    "Custom Range": None,
+}
 
 class ProjectDashboard(QDialog):
     """
@@ -18,6 +47,17 @@ class ProjectDashboard(QDialog):
         self.project_id = project_id
         self.project_name = project_name
         self.db = db_manager
+        self.snapshot = None
+        # Labour breakdown rows per grouping; only re-queried after allocations change
+        self.labour_rows = {}
+        self.completion_recorded = False
+
+        # Photo thumbnails are decoded on a thread pool; copying new photos into the store uses its own thread
+        self.thumbnails = ThumbnailLoader(self.db.attachments, parent=self)
+        self.thumbnails.thumbnail_ready.connect(self.show_thumbnail)
+        self.file_worker = ThreadPoolExecutor(max_workers=1)
+        self.shown_log_id = None
+        self.photo_items = {}
         
         self.setWindowTitle(f"Project Dashboard: {project_name}")
         self.setGeometry(150, 150, 1200, 800) 
@@ -34,6 +74,7 @@ class ProjectDashboard(QDialog):
 
         
         self.setup_task_management()
+        self.setup_schedule()
         self.setup_resource_inventory()
         self.setup_daily_log()
         self.setup_reports()
@@ -41,13 +82,34 @@ class ProjectDashboard(QDialog):
        
         self.load_all_data()
 
+        # Pick up edits made to this project by other users of the same database
+        self.watcher = ChangeWatcher(self.db.conn, project_id=project_id, own_writes=self.db.writer, parent=self)
+        self.watcher.tables_changed.connect(self.refresh_changed_tables)
+
     def load_all_data(self):
-        """Loads data for all tabs upon dashboard initialization."""
+        """Loads the project snapshot in bulk and fills all tabs from it."""
+        self.snapshot = ProjectSnapshot.load(self.db, self.project_id, self.selected_log_range())
         self.load_tasks()
         self.load_materials()
         self.load_daily_logs()
         self.update_reports()
 
+    def refresh_changed_tables(self, tables):
+        """Reloads only the parts of the snapshot (and the tabs) whose tables changed elsewhere."""
+        # Deleted tasks or log entries elsewhere may have taken allocations with them
+        self.labour_rows.clear()
+        if 'tasks' in tables:
+            self.snapshot.load_tasks(self.db)
+            self.load_tasks()
+        if 'materials' in tables:
+            self.snapshot.load_materials(self.db)
+            self.load_materials()
+        if 'daily_log' in tables:
+            self.snapshot.load_logs(self.db, *self.snapshot.log_range)
+            self.snapshot.load_logged_hours(self.db)
+            self.load_daily_logs()
+        self.update_reports()
+
     # Task Management 
 
     def setup_task_management(self):
@@ -64,8 +126,15 @@ class ProjectDashboard(QDialog):
         self.task_prereq_combo = QComboBox() 
         self.task_prereq_combo.addItem("None", None) 
 
+        self.task_start_input = QLineEdit()
+        self.task_start_input.setPlaceholderText("YYYY-MM-DD")
+        self.task_end_input = QLineEdit()
+        self.task_end_input.setPlaceholderText("YYYY-MM-DD")
+
         task_form.addRow("Task Name:", self.task_name_input)
         task_form.addRow("Prerequisite:", self.task_prereq_combo)
+        task_form.addRow("Planned Start:", self.task_start_input)
+        task_form.addRow("Planned End:", self.task_end_input)
         
         add_task_btn = QPushButton("Add New Task")
         add_task_btn.setStyleSheet("background-color: #38761d; color: white; padding: 5px;")
@@ -79,10 +148,11 @@ class ProjectDashboard(QDialog):
         
         task_layout.addWidget(QLabel("<h3>Current Tasks</h3>"))
         self.task_table = QTableWidget()
-        self.task_table.setColumnCount(4)
-        self.task_table.setHorizontalHeaderLabels(['ID', 'Task Name', 'Prerequisite', 'Status'])
+        self.task_table.setColumnCount(7)
+        self.task_table.setHorizontalHeaderLabels(['ID', 'Task Name', 'Prerequisite', 'Status', 'Planned Start', 'Planned End', 'Days'])
         self.task_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         self.task_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.task_table.setSelectionMode(QAbstractItemView.ExtendedSelection) # Ctrl/Shift-click for bulk updates
         self.task_table.setEditTriggers(QAbstractItemView.NoEditTriggers) # Tasks are not directly editable in table
         task_layout.addWidget(self.task_table)
 
@@ -93,21 +163,41 @@ class ProjectDashboard(QDialog):
         progress_task_btn.setStyleSheet("background-color: #e67e22; color: white; padding: 8px;") 
         progress_task_btn.clicked.connect(lambda: self.update_task_status("In Progress"))
         
-        complete_task_btn = QPushButton("Mark Selected Task as Complete")
+        complete_task_btn = QPushButton("Mark Selected Tasks as Complete")
         complete_task_btn.setStyleSheet("background-color: #008080; color: white; padding: 8px;")
         complete_task_btn.clicked.connect(lambda: self.update_task_status("Complete"))
 
-        delete_task_btn = QPushButton("Delete Selected Task")
+        plan_task_btn = QPushButton("Set Planned Dates of Selected Tasks")
+        plan_task_btn.setStyleSheet("background-color: #0b5394; color: white; padding: 8px;")
+        plan_task_btn.setToolTip("Applies the Planned Start and Planned End above (empty clears a date)")
+        plan_task_btn.clicked.connect(self.set_planned_dates)
+
+        delete_task_btn = QPushButton("Delete Selected Tasks")
         delete_task_btn.setStyleSheet("background-color: #cc0000; color: white; padding: 8px;")
         delete_task_btn.clicked.connect(self.delete_task)
 
         task_action_layout.addWidget(progress_task_btn)
         task_action_layout.addWidget(complete_task_btn)
+        task_action_layout.addWidget(plan_task_btn)
         task_action_layout.addWidget(delete_task_btn)
         task_layout.addLayout(task_action_layout)
 
         self.tabs.addTab(task_tab, "Tasks & Dependencies")
 
+    def planned_dates_input(self):
+        """Returns (planned_start, planned_end) from the task form, or None after warning about bad input."""
+        try:
+            planned_start = normalize_date(self.task_start_input.text())
+            planned_end = normalize_date(self.task_end_input.text())
+        except ValueError:
+            QMessageBox.warning(self, "Input Error", "Planned dates must be in YYYY-MM-DD format (or left empty).")
+            return None
+
+        if planned_start and planned_end and planned_end < planned_start:
+            QMessageBox.warning(self, "Input Error", "Planned End cannot be before Planned Start.")
+            return None
+        return planned_start, planned_end
+
     def add_task(self):
         """Adds a new task to the database."""
         name = self.task_name_input.text().strip()
@@ -117,29 +207,36 @@ class ProjectDashboard(QDialog):
             QMessageBox.warning(self, "Input Error", "Task Name cannot be empty.")
             return
 
-        query = "INSERT INTO tasks (project_id, name, prerequisite_task_id) VALUES (?, ?, ?)"
-        if self.db.execute_query(query, (self.project_id, name, prereq_id)):
+        planned = self.planned_dates_input()
+        if planned is None:
+            return
+        planned_start, planned_end = planned
+
+        query = "INSERT INTO tasks (project_id, name, prerequisite_task_id, planned_start, planned_end) VALUES (?, ?, ?, ?, ?)"
+
+        def task_added(task_id):
             self.task_name_input.clear()
+            self.task_start_input.clear()
+            self.task_end_input.clear()
+            self.snapshot.add_task(task_id, name, prereq_id, planned_start=planned_start, planned_end=planned_end)
             self.load_tasks()
             QMessageBox.information(self, "Success", "Task added.")
+
+        self.db.submit_query(query, (self.project_id, name, prereq_id, planned_start, planned_end), on_done=task_added)
         
     def load_tasks(self):
-        """Loads tasks from the database into the table and prerequisite combo box."""
-      
-        query = """
-        SELECT t1.id, t1.name, t2.name AS prereq_name, t1.status
-        FROM tasks t1
-        LEFT JOIN tasks t2 ON t1.prerequisite_task_id = t2.id
-        WHERE t1.project_id = ? ORDER BY t1.id DESC
-        """
-        tasks = self.db.fetch_data(query, (self.project_id,))
+        """Fills the task table and prerequisite combo box from the project snapshot."""
+        tasks = self.snapshot.tasks
         
         self.task_table.setRowCount(len(tasks))
         
-       
-        for row, (task_id, name, prereq_name, status) in enumerate(tasks):
-            self.task_table.setItem(row, 0, QTableWidgetItem(str(task_id)))
-            self.task_table.setItem(row, 1, QTableWidgetItem(name))
+        # Newest tasks first
+        for row, pos in enumerate(reversed(range(len(tasks)))):
+            prereq_name = self.snapshot.task_name(tasks.prereq_ids[pos])
+            status = self.snapshot.task_status(pos)
+
+            self.task_table.setItem(row, 0, QTableWidgetItem(str(tasks.ids[pos])))
+            self.task_table.setItem(row, 1, QTableWidgetItem(tasks.names[pos]))
             self.task_table.setItem(row, 2, QTableWidgetItem(prereq_name if prereq_name else "None"))
             
             status_item = QTableWidgetItem(status)
@@ -151,83 +248,148 @@ class ProjectDashboard(QDialog):
                 status_item.setBackground(Qt.red)
             self.task_table.setItem(row, 3, status_item)
 
+            duration = self.snapshot.planned_duration(pos)
+            self.task_table.setItem(row, 4, QTableWidgetItem(iso_date(tasks.planned_start[pos]) or ""))
+            self.task_table.setItem(row, 5, QTableWidgetItem(iso_date(tasks.planned_end[pos]) or ""))
+            self.task_table.setItem(row, 6, QTableWidgetItem(str(duration) if duration else ""))
+
         
         self.task_prereq_combo.clear()
         self.task_prereq_combo.addItem("None", None)
-        for task_id, name, _, _ in tasks:
-            self.task_prereq_combo.addItem(name, task_id)
-            
+        for pos in reversed(range(len(tasks))):
+            self.task_prereq_combo.addItem(tasks.names[pos], tasks.ids[pos])
+
+        self.gantt_view.load_snapshot(self.snapshot)
+        self.load_allocation_tasks()
         self.update_reports()
 
+    def selected_tasks(self):
+        """Returns (task_id, task_name) for every selected row of the task table."""
+        tasks = []
+        for index in self.task_table.selectionModel().selectedRows():
+            task_id_item = self.task_table.item(index.row(), 0)
+            task_name_item = self.task_table.item(index.row(), 1)
+            if task_id_item and task_name_item:
+                tasks.append((int(task_id_item.text()), task_name_item.text()))
+        return tasks
+
     def update_task_status(self, status):
-        """Updates the status of the selected task (FR1.3)."""
-        selected_rows = self.task_table.selectionModel().selectedRows()
-        
-        if not selected_rows:
-            QMessageBox.warning(self, "Selection Error", "Please select a task to update.")
-            return
+        """Updates the status of all selected tasks in one transaction (FR1.3)."""
+        tasks = self.selected_tasks()
 
-        row_index = selected_rows[0].row()
-        task_id_item = self.task_table.item(row_index, 0)
-        
-        if not task_id_item:
-            QMessageBox.critical(self, "Data Error", "Could not retrieve task ID.")
+        if not tasks:
+            QMessageBox.warning(self, "Selection Error", "Please select at least one task to update.")
             return
-            
-        task_id = int(task_id_item.text())
 
-        
+        task_ids = json.dumps([task_id for task_id, _ in tasks])
+
         if status == "Complete":
-            prereq_query = """
-            SELECT t2.name, t2.status 
-            FROM tasks t1 
-            JOIN tasks t2 ON t1.prerequisite_task_id = t2.id
-            WHERE t1.id = ? AND t2.status != 'Complete'
-            """
-            prereq_data = self.db.fetch_data(prereq_query, (task_id,))
-
-            if prereq_data:
-                prereq_name = prereq_data[0][0]
-                QMessageBox.warning(self, "Constraint Violation", 
-                    f"Cannot mark task as '{status}'. Prerequisite task '{prereq_name}' must be completed first."
+            # A prerequisite is satisfied if it is already complete or is being completed in this batch
+            violations = self.db.fetch_data(PREREQUISITE_VIOLATIONS_QUERY, {'ids': task_ids})
+
+            if violations:
+                details = "\n".join(f"'{task}' needs '{prereq}'" for task, prereq in violations)
+                QMessageBox.warning(self, "Constraint Violation",
+                    f"Cannot mark tasks as '{status}'. These prerequisites must be completed first:\n{details}"
                 )
                 return
 
-        query = "UPDATE tasks SET status = ? WHERE id = ?"
-        if self.db.execute_query(query, (status, task_id)):
+        def statuses_updated(_):
+            self.snapshot.set_task_status([task_id for task_id, _ in tasks], status)
             self.load_tasks()
-        
+
+        self.db.submit_query(SET_STATUS_QUERY, {'status': status, 'ids': task_ids}, on_done=statuses_updated)
+
+    def set_planned_dates(self):
+        """Gives all selected tasks the planned dates entered in the task form (for the Gantt schedule)."""
+        tasks = self.selected_tasks()
+
+        if not tasks:
+            QMessageBox.warning(self, "Selection Error", "Please select at least one task to schedule.")
+            return
+
+        planned = self.planned_dates_input()
+        if planned is None:
+            return
+        planned_start, planned_end = planned
+
+        query = "UPDATE tasks SET planned_start = ?, planned_end = ? WHERE id IN (SELECT value FROM json_each(?))"
+        task_ids = [task_id for task_id, _ in tasks]
+
+        def dates_planned(_):
+            self.task_start_input.clear()
+            self.task_end_input.clear()
+            self.snapshot.set_planned_dates(task_ids, planned_start, planned_end)
+            self.load_tasks()
+
+        self.db.submit_query(query, (planned_start, planned_end, json.dumps(task_ids)), on_done=dates_planned)
+
     def delete_task(self):
-        """Deletes the selected task."""
-        selected_rows = self.task_table.selectionModel().selectedRows()
-        
-        if not selected_rows:
-            QMessageBox.warning(self, "Selection Error", "Please select a task to delete.")
+        """Deletes all selected tasks in one transaction."""
+        tasks = self.selected_tasks()
+
+        if not tasks:
+            QMessageBox.warning(self, "Selection Error", "Please select at least one task to delete.")
             return
 
-        row_index = selected_rows[0].row()
-        task_id_item = self.task_table.item(row_index, 0)
-        task_name_item = self.task_table.item(row_index, 1)
+        task_ids = json.dumps([task_id for task_id, _ in tasks])
 
-        if not task_id_item or not task_name_item:
-            QMessageBox.critical(self, "Data Error", "Could not retrieve task ID or Name.")
+        # Tasks that stay behind must not lose their prerequisite
+        dependents_query = """
+        SELECT t1.name, t2.name
+        FROM tasks t1
+        JOIN tasks t2 ON t1.prerequisite_task_id = t2.id
+        WHERE t2.id IN (SELECT value FROM json_each(?))
+          AND t1.id NOT IN (SELECT value FROM json_each(?))
+        """
+        dependents = self.db.fetch_data(dependents_query, (task_ids, task_ids))
+
+        if dependents:
+            details = "\n".join(f"'{task}' depends on '{prereq}'" for task, prereq in dependents)
+            QMessageBox.warning(self, "Constraint Violation",
+                f"Cannot delete the selected tasks while other tasks depend on them:\n{details}"
+            )
             return
-            
-        task_id = int(task_id_item.text())
-        task_name = task_name_item.text()
 
-      
-        reply = QMessageBox.question(self, 'Confirm Deletion', 
-            f"Are you sure you want to delete task '{task_name}'? This cannot be undone.",
+        if len(tasks) == 1:
+            message = f"Are you sure you want to delete task '{tasks[0][1]}'? This cannot be undone."
+        else:
+            message = f"Are you sure you want to delete {len(tasks)} tasks? This cannot be undone."
+
+        reply = QMessageBox.question(self, 'Confirm Deletion', message,
             QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
 
         if reply == QMessageBox.No:
             return
 
-        query = "DELETE FROM tasks WHERE id = ?"
-        if self.db.execute_query(query, (task_id,)):
-            QMessageBox.information(self, "Success", f"Task '{task_name}' deleted.")
+        query = "DELETE FROM tasks WHERE id IN (SELECT value FROM json_each(?))"
+
+        def tasks_deleted(_):
+            # Hours allocated to the deleted tasks went with them
+            self.labour_rows.clear()
+            self.snapshot.remove_tasks([task_id for task_id, _ in tasks])
             self.load_tasks()
+            self.show_log_allocations()
+            QMessageBox.information(self, "Success", f"{len(tasks)} task(s) deleted.")
+
+        self.db.submit_query(query, (task_ids,), on_done=tasks_deleted)
+
+    # Schedule
+
+    def setup_schedule(self):
+        """Creates the Gantt schedule tab, drawn from the tasks' planned and actual dates."""
+        schedule_tab = QWidget()
+        schedule_layout = QVBoxLayout(schedule_tab)
+        schedule_layout.addWidget(QLabel("<h2>Schedule</h2>"))
+        schedule_layout.addWidget(QLabel(
+            "Bars show planned dates (red: not started, orange: in progress, green: complete); "
+            "the dark strip is the actual progress. Scroll to zoom, Ctrl+scroll to zoom the timeline, drag to pan."
+        ))
+
+        self.gantt_view = GanttView()
+        schedule_layout.addWidget(self.gantt_view)
+
+        self.tabs.addTab(schedule_tab, "Schedule (Gantt)")
 
     # Resource Inventory 
 
@@ -320,37 +482,41 @@ class ProjectDashboard(QDialog):
             return
 
         query = "INSERT INTO materials (project_id, name, quantity, unit_cost, alert_threshold) VALUES (?, ?, ?, ?, ?)"
-        
-        if self.db.execute_query(query, (self.project_id, name, qty, cost, threshold)):
+
+        def material_added(mat_id):
             self.material_name_input.clear()
             self.material_cost_input.clear()
             self.material_threshold_input.clear()
             self.add_qty_input.clear()
+            self.snapshot.add_material(mat_id, name, qty, cost, threshold)
             self.load_materials()
+            self.update_reports()
             QMessageBox.information(self, "Success", f"Material '{name}' added.")
 
+        self.db.submit_query(query, (self.project_id, name, qty, cost, threshold), on_done=material_added)
+
     def load_materials(self):
-        
-        query = "SELECT id, name, quantity, unit_cost, alert_threshold FROM materials WHERE project_id = ? ORDER BY name ASC"
-        materials = self.db.fetch_data(query, (self.project_id,))
+        """Fills the inventory table from the project snapshot, sorted by name."""
+        materials = self.snapshot.materials
         
         self.inventory_table.setRowCount(len(materials))
-        low_stock_materials = []
         
-        for row, (mat_id, name, qty, cost, threshold) in enumerate(materials):
-            self.inventory_table.setItem(row, 0, QTableWidgetItem(str(mat_id)))
-            self.inventory_table.setItem(row, 1, QTableWidgetItem(name))
+        for row, pos in enumerate(sorted(range(len(materials)), key=materials.names.__getitem__)):
+            qty = materials.quantities[pos]
+            threshold = materials.thresholds[pos]
+
+            self.inventory_table.setItem(row, 0, QTableWidgetItem(str(materials.ids[pos])))
+            self.inventory_table.setItem(row, 1, QTableWidgetItem(materials.names[pos]))
             
             qty_item = QTableWidgetItem(f"{qty:.2f}")
             self.inventory_table.setItem(row, 2, qty_item)
-            self.inventory_table.setItem(row, 3, QTableWidgetItem(f"Rs.{cost:.2f}"))
+            self.inventory_table.setItem(row, 3, QTableWidgetItem(f"Rs.{materials.unit_costs[pos]:.2f}"))
             self.inventory_table.setItem(row, 4, QTableWidgetItem(f"{threshold:.2f}"))
             
             if qty <= threshold:
-                low_stock_materials.append(name)
                 qty_item.setBackground(Qt.yellow)
         
-        self.update_stock_alert(low_stock_materials)
+        self.update_stock_alert(self.snapshot.low_stock_materials())
 
     def update_stock_alert(self, low_stock_materials):
         """Updates the stock alert label (FR2.3)."""
@@ -396,15 +562,19 @@ class ProjectDashboard(QDialog):
         def update_action():
             try:
                 new_qty = float(qty_input.text().strip())
-                query = "UPDATE materials SET quantity = ? WHERE id = ?"
-                if self.db.execute_query(query, (new_qty, mat_id)):
-                    QMessageBox.information(self, "Success", f"Quantity for {mat_name} updated to {new_qty:.2f}.")
-                    self.load_materials()
-                    dialog.accept()
-                else:
-                    QMessageBox.critical(self, "Error", f"Failed to update quantity.")
             except ValueError:
                 QMessageBox.warning(self, "Input Error", "Please enter a valid number for quantity.")
+                return
+
+            def quantity_updated(_):
+                self.snapshot.set_material_quantity(mat_id, new_qty)
+                self.load_materials()
+                self.update_reports()
+                QMessageBox.information(self, "Success", f"Quantity for {mat_name} updated to {new_qty:.2f}.")
+                dialog.accept()
+
+            query = "UPDATE materials SET quantity = ? WHERE id = ?"
+            self.db.submit_query(query, (new_qty, mat_id), on_done=quantity_updated)
 
         update_btn.clicked.connect(update_action)
         layout.addWidget(update_btn)
@@ -439,9 +609,14 @@ class ProjectDashboard(QDialog):
             return
 
         query = "DELETE FROM materials WHERE id = ?"
-        if self.db.execute_query(query, (mat_id,)):
-            QMessageBox.information(self, "Success", f"Material '{mat_name}' deleted.")
+
+        def material_deleted(_):
+            self.snapshot.remove_materials([mat_id])
             self.load_materials()
+            self.update_reports()
+            QMessageBox.information(self, "Success", f"Material '{mat_name}' deleted.")
+
+        self.db.submit_query(query, (mat_id,), on_done=material_deleted)
 
     
 
@@ -481,6 +656,33 @@ class ProjectDashboard(QDialog):
 
         # Log History Table 
         log_layout.addWidget(QLabel("<h3>Log History</h3>"))
+
+        range_layout = QHBoxLayout()
+        self.log_range_combo = QComboBox()
+        self.log_range_combo.addItems(list(LOG_RANGE_PRESETS))
+        self.log_range_combo.currentTextChanged.connect(self.log_range_preset_changed)
+
+        self.log_from_input = QDateEdit(QDate.currentDate().addDays(-14))
+        self.log_from_input.setCalendarPopup(True)
+        self.log_from_input.setDisplayFormat("yyyy-MM-dd")
+        self.log_to_input = QDateEdit(QDate.currentDate())
+        self.log_to_input.setCalendarPopup(True)
+        self.log_to_input.setDisplayFormat("yyyy-MM-dd")
+
+        apply_range_btn = QPushButton("Apply")
+        apply_range_btn.clicked.connect(self.apply_log_range)
+
+        range_layout.addWidget(QLabel("Show:"))
+        range_layout.addWidget(self.log_range_combo)
+        range_layout.addWidget(QLabel("From:"))
+        range_layout.addWidget(self.log_from_input)
+        range_layout.addWidget(QLabel("To:"))
+        range_layout.addWidget(self.log_to_input)
+        range_layout.addWidget(apply_range_btn)
+        range_layout.addStretch(1)
+        log_layout.addLayout(range_layout)
+        self.log_range_preset_changed(self.log_range_combo.currentText())
+
         self.log_table = QTableWidget()
         self.log_table.setColumnCount(4)
         self.log_table.setHorizontalHeaderLabels(['ID', 'Date', 'Hours', 'Description'])
@@ -489,6 +691,7 @@ class ProjectDashboard(QDialog):
         self.log_table.horizontalHeader().setSectionResizeMode(2, QHeaderView.ResizeToContents) # Hours
         self.log_table.horizontalHeader().setSectionResizeMode(3, QHeaderView.Stretch) # Description
         self.log_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.log_table.currentCellChanged.connect(self.log_selection_changed)
         log_layout.addWidget(self.log_table) 
         
         delete_log_btn = QPushButton("Delete Selected Log Entry")
@@ -496,6 +699,87 @@ class ProjectDashboard(QDialog):
         delete_log_btn.clicked.connect(self.delete_log_entry)
         log_layout.addWidget(delete_log_btn)
 
+        # Photos and labour allocation of the selected log entry, side by side
+        details_layout = QHBoxLayout()
+        photo_layout = QVBoxLayout()
+        photo_header = QHBoxLayout()
+        photo_header.addWidget(QLabel("<h3>Photos</h3>"))
+        photo_header.addStretch(1)
+        attach_photo_btn = QPushButton("Attach Photos...")
+        attach_photo_btn.clicked.connect(self.attach_photos)
+        remove_photo_btn = QPushButton("Remove Selected Photo")
+        remove_photo_btn.clicked.connect(self.remove_photo)
+        photo_header.addWidget(attach_photo_btn)
+        photo_header.addWidget(remove_photo_btn)
+        photo_layout.addLayout(photo_header)
+
+        self.photo_list = QListWidget()
+        self.photo_list.setViewMode(QListView.IconMode)
+        self.photo_list.setFlow(QListView.LeftToRight)
+        self.photo_list.setWrapping(False)
+        self.photo_list.setMovement(QListView.Static)
+        self.photo_list.setIconSize(QSize(THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+        self.photo_list.setUniformItemSizes(True)
+        self.photo_list.setLayoutMode(QListView.Batched)
+        self.photo_list.setFixedHeight(THUMBNAIL_SIZE + 50)
+        self.photo_list.itemDoubleClicked.connect(self.open_photo)
+        # Thumbnails are only decoded once they scroll into view
+        self.photo_list.horizontalScrollBar().valueChanged.connect(self.request_visible_thumbnails)
+        photo_layout.addWidget(self.photo_list)
+        details_layout.addLayout(photo_layout, 1)
+
+        placeholder = QPixmap(THUMBNAIL_SIZE, THUMBNAIL_SIZE)
+        placeholder.fill(QColor('#eeeeee'))
+        self.photo_placeholder = QIcon(placeholder)
+
+        allocation_layout = QVBoxLayout()
+        allocation_header = QHBoxLayout()
+        allocation_header.addWidget(QLabel("<h3>Labour Allocation</h3>"))
+        allocation_header.addStretch(1)
+        new_trade_btn = QPushButton("New Trade...")
+        new_trade_btn.clicked.connect(self.add_trade)
+        new_crew_btn = QPushButton("New Crew...")
+        new_crew_btn.clicked.connect(self.add_crew)
+        allocation_header.addWidget(new_trade_btn)
+        allocation_header.addWidget(new_crew_btn)
+        allocation_layout.addLayout(allocation_header)
+
+        allocation_form = QHBoxLayout()
+        self.allocation_task_combo = QComboBox()
+        self.allocation_crew_combo = QComboBox()
+        self.allocation_hours_input = QLineEdit()
+        self.allocation_hours_input.setPlaceholderText("Hours")
+        self.allocation_hours_input.setFixedWidth(60)
+        allocate_btn = QPushButton("Allocate")
+        allocate_btn.clicked.connect(self.allocate_hours)
+        allocation_form.addWidget(QLabel("Task:"))
+        allocation_form.addWidget(self.allocation_task_combo, 1)
+        allocation_form.addWidget(QLabel("Crew:"))
+        allocation_form.addWidget(self.allocation_crew_combo, 1)
+        allocation_form.addWidget(self.allocation_hours_input)
+        allocation_form.addWidget(allocate_btn)
+        allocation_layout.addLayout(allocation_form)
+
+        self.allocation_table = QTableWidget()
+        self.allocation_table.setColumnCount(4)
+        self.allocation_table.setHorizontalHeaderLabels(['ID', 'Task', 'Crew', 'Hours'])
+        self.allocation_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeToContents)
+        self.allocation_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
+        self.allocation_table.horizontalHeader().setSectionResizeMode(2, QHeaderView.Stretch)
+        self.allocation_table.horizontalHeader().setSectionResizeMode(3, QHeaderView.ResizeToContents)
+        self.allocation_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.allocation_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.allocation_table.setFixedHeight(THUMBNAIL_SIZE - 10)
+        allocation_layout.addWidget(self.allocation_table)
+
+        remove_allocation_btn = QPushButton("Remove Selected Allocation")
+        remove_allocation_btn.clicked.connect(self.remove_allocation)
+        allocation_layout.addWidget(remove_allocation_btn)
+        details_layout.addLayout(allocation_layout, 1)
+
+        log_layout.addLayout(details_layout)
+        self.load_crews()
+
         self.tabs.addTab(log_tab, "Daily Log")
         
     def add_daily_log(self):
@@ -511,32 +795,66 @@ class ProjectDashboard(QDialog):
         try:
             hours = float(hours_str)
             
-            datetime.strptime(log_date, '%Y-%m-%d')
+            log_date = normalize_date(log_date)
         except ValueError:
             QMessageBox.warning(self, "Input Error", "Hours must be a number, and Date must be in YYYY-MM-DD format.")
             return
 
         query = "INSERT INTO daily_log (project_id, log_date, description, hours_worked) VALUES (?, ?, ?, ?)"
-        
-        if self.db.execute_query(query, (self.project_id, log_date, description, hours)):
+
+        def log_saved(log_id):
             self.log_hours_input.clear()
             self.log_description_input.clear()
             self.log_date_input.setText(QDate.currentDate().toString(Qt.ISODate))
+            self.snapshot.add_log(log_id, log_date, hours, description)
             self.load_daily_logs()
+            self.update_reports()
             QMessageBox.information(self, "Success", "Daily log entry saved.")
+
+        self.db.submit_query(query, (self.project_id, log_date, description, hours), on_done=log_saved)
             
+    def selected_log_range(self):
+        """Returns the (start, end) ISO dates chosen in the Log History filter, None for open ends."""
+        preset = self.log_range_combo.currentText()
+        if preset == "All Dates":
+            return (None, None)
+        return (self.log_from_input.date().toString(Qt.ISODate), self.log_to_input.date().toString(Qt.ISODate))
+
+    def log_range_preset_changed(self, preset):
+        """Moves the date pickers to the chosen preset; presets apply immediately."""
+        custom = preset == "Custom Range"
+        self.log_from_input.setEnabled(custom)
+        self.log_to_input.setEnabled(custom)
+
+        days = LOG_RANGE_PRESETS.get(preset)
+        if days is not None:
+            self.log_from_input.setDate(QDate.currentDate().addDays(-days))
+            self.log_to_input.setDate(QDate.currentDate())
+
+        if not custom and self.snapshot is not None:
+            self.apply_log_range()
+
+    def apply_log_range(self):
+        """Reloads only the log entries inside the selected date range."""
+        start, end = self.selected_log_range()
+        if start and end and end < start:
+            QMessageBox.warning(self, "Input Error", "The 'From' date must be before the 'To' date.")
+            return
+        self.snapshot.load_logs(self.db, start, end)
+        self.load_daily_logs()
+        self.update_reports()
+
     def load_daily_logs(self):
-        """Loads daily logs from the database into the log history table."""
-        query = "SELECT id, log_date, hours_worked, description FROM daily_log WHERE project_id = ? ORDER BY log_date DESC"
-        logs = self.db.fetch_data(query, (self.project_id,))
+        """Fills the log history table from the project snapshot, newest date first."""
+        logs = self.snapshot.logs
         
         self.log_table.setRowCount(len(logs))
         
-        for row, (log_id, date, hours, description) in enumerate(logs):
-            self.log_table.setItem(row, 0, QTableWidgetItem(str(log_id)))
-            self.log_table.setItem(row, 1, QTableWidgetItem(date))
-            self.log_table.setItem(row, 2, QTableWidgetItem(f"{hours:.1f}"))
-            self.log_table.setItem(row, 3, QTableWidgetItem(description))
+        for row, pos in enumerate(sorted(range(len(logs)), key=logs.dates.__getitem__, reverse=True)):
+            self.log_table.setItem(row, 0, QTableWidgetItem(str(logs.ids[pos])))
+            self.log_table.setItem(row, 1, QTableWidgetItem(logs.dates[pos]))
+            self.log_table.setItem(row, 2, QTableWidgetItem(f"{logs.hours[pos]:.1f}"))
+            self.log_table.setItem(row, 3, QTableWidgetItem(logs.descriptions[pos]))
 
     def delete_log_entry(self):
         """Deletes the selected daily log entry."""
@@ -565,9 +883,286 @@ class ProjectDashboard(QDialog):
             return
 
         query = "DELETE FROM daily_log WHERE id = ?"
-        if self.db.execute_query(query, (log_id,)):
-            QMessageBox.information(self, "Success", "Log entry deleted.")
+        photo_hashes = [row[0] for row in self.db.fetch_data("SELECT sha256 FROM log_attachments WHERE log_id = ?", (log_id,))]
+
+        def log_deleted(_):
+            self.snapshot.remove_logs([log_id])
             self.load_daily_logs()
+            self.labour_changed()
+            if photo_hashes:
+                # The entry's photo links were removed with it; drop files no other entry uses
+                self.db.submit_call(lambda conn: self.db.attachments.remove_unreferenced(conn, photo_hashes))
+            QMessageBox.information(self, "Success", "Log entry deleted.")
+
+        self.db.submit_query(query, (log_id,), on_done=log_deleted)
+
+    def selected_log_id(self):
+        row = self.log_table.currentRow()
+        item = self.log_table.item(row, 0) if row >= 0 else None
+        return int(item.text()) if item else None
+
+    def log_selection_changed(self, *_):
+        if self.selected_log_id() != self.shown_log_id:
+            self.show_log_photos()
+            self.show_log_allocations()
+
+    def show_log_photos(self):
+        """Lists the selected log entry's photos with placeholders; thumbnails fill in as they are decoded."""
+        self.thumbnails.cancel_pending()
+        self.photo_list.clear()
+        self.photo_items = {}
+        self.shown_log_id = self.selected_log_id()
+        if self.shown_log_id is None:
+            return
+
+        photos = self.db.fetch_data(
+            "SELECT id, sha256, file_name FROM log_attachments WHERE log_id = ? ORDER BY id", (self.shown_log_id,)
+        )
+        for attachment_id, sha256, file_name in photos:
+            item = QListWidgetItem(self.photo_placeholder, file_name)
+            item.setData(Qt.UserRole, (attachment_id, sha256))
+            item.setToolTip(file_name)
+            self.photo_list.addItem(item)
+            self.photo_items.setdefault(sha256, []).append(item)
+
+        # Item geometry is only known once the list has laid itself out
+        QTimer.singleShot(0, self.request_visible_thumbnails)
+
+    def request_visible_thumbnails(self, *_):
+        viewport = self.photo_list.viewport().rect()
+        for sha256, items in self.photo_items.items():
+            if any(self.photo_list.visualItemRect(item).intersects(viewport) for item in items):
+                self.thumbnails.request(sha256)
+
+    def show_thumbnail(self, sha256, image):
+        items = self.photo_items.pop(sha256, None)
+        if not items:
+            return
+        if image.isNull():
+            for item in items:
+                item.setToolTip(f"{item.text()} (cannot be displayed)")
+            return
+        icon = QIcon(QPixmap.fromImage(image))
+        for item in items:
+            item.setIcon(icon)
+
+    def attach_photos(self):
+        """Copies the chosen photos into the attachment store and links them to the selected log entry."""
+        log_id = self.selected_log_id()
+        if log_id is None:
+            QMessageBox.warning(self, "Selection Error", "Please select a log entry to attach photos to.")
+            return
+
+        paths, _ = QFileDialog.getOpenFileNames(self, "Attach Photos", "", PHOTO_FILE_FILTER)
+        if not paths:
+            return
+
+        store = self.db.attachments
+
+        def store_files():
+            # Hashing and copying large photos happens off the GUI thread
+            return [(path, os.path.basename(path)) + store.add_file(path) for path in paths]
+
+        def link_files(stored):
+            def insert_links(conn):
+                for path, file_name, sha256, size in stored:
+                    # The file may have been cleaned up since it was copied if it had no other links
+                    if not os.path.exists(store.object_path(sha256)):
+                        store.add_file(path)
+                    conn.execute(
+                        "INSERT INTO log_attachments (log_id, sha256, file_name, size) "
+                        "SELECT ?, ?, ?, ? WHERE EXISTS (SELECT 1 FROM daily_log WHERE id = ?)",
+                        (log_id, sha256, file_name, size, log_id)
+                    )
+                return len(stored)
+
+            def files_linked(count):
+                if self.shown_log_id == log_id:
+                    self.show_log_photos()
+                QMessageBox.information(self, "Success", f"{count} photo(s) attached to log entry {log_id}.")
+
+            self.db.submit_call(insert_links, on_done=files_linked)
+
+        self.db.track(self.file_worker.submit(store_files), on_done=link_files)
+
+    def remove_photo(self):
+        item = self.photo_list.currentItem()
+        if item is None:
+            QMessageBox.warning(self, "Selection Error", "Please select a photo to remove.")
+            return
+
+        attachment_id, sha256 = item.data(Qt.UserRole)
+        reply = QMessageBox.question(self, 'Confirm Removal',
+            f"Remove photo '{item.text()}' from this log entry?",
+            QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        if reply == QMessageBox.No:
+            return
+
+        def photo_removed(_):
+            self.db.submit_call(lambda conn: self.db.attachments.remove_unreferenced(conn, [sha256]))
+            self.show_log_photos()
+
+        self.db.submit_query("DELETE FROM log_attachments WHERE id = ?", (attachment_id,), on_done=photo_removed)
+
+    def open_photo(self, item):
+        """Opens the full-size photo in the system viewer, via a temporary copy carrying its original name."""
+        _, sha256 = item.data(Qt.UserRole)
+        folder = os.path.join(tempfile.gettempdir(), 'construction_taskflow_photos', sha256[:12])
+        path = os.path.join(folder, item.text())
+        try:
+            if not os.path.exists(path):
+                os.makedirs(folder, exist_ok=True)
+                shutil.copyfile(self.db.attachments.object_path(sha256), path)
+        except OSError as e:
+            QMessageBox.critical(self, "File Error", f"Could not open photo: {e}")
+            return
+        QDesktopServices.openUrl(QUrl.fromLocalFile(path))
+
+    # Labour allocation
+
+    def load_allocation_tasks(self):
+        """Offers this project's tasks, in task table order, for hour allocation."""
+        current = self.allocation_task_combo.currentData()
+        tasks = self.snapshot.tasks
+        self.allocation_task_combo.clear()
+        for pos in sorted(range(len(tasks)), key=tasks.ids.__getitem__):
+            self.allocation_task_combo.addItem(tasks.names[pos], tasks.ids[pos])
+        index = self.allocation_task_combo.findData(current)
+        if index >= 0:
+            self.allocation_task_combo.setCurrentIndex(index)
+
+    def load_crews(self):
+        current = self.allocation_crew_combo.currentData()
+        crews = self.db.fetch_data(
+            "SELECT c.id, c.name, tr.name FROM crews c LEFT JOIN trades tr ON tr.id = c.trade_id ORDER BY c.name"
+        )
+        self.allocation_crew_combo.clear()
+        for crew_id, name, trade in crews:
+            self.allocation_crew_combo.addItem(f"{name} ({trade})" if trade else name, crew_id)
+        index = self.allocation_crew_combo.findData(current)
+        if index >= 0:
+            self.allocation_crew_combo.setCurrentIndex(index)
+
+    def add_trade(self):
+        name, ok = QInputDialog.getText(self, "New Trade", "Trade name (e.g. Electrical):")
+        name = name.strip()
+        if not ok or not name:
+            return
+        if self.db.fetch_data("SELECT 1 FROM trades WHERE name = ?", (name,)):
+            QMessageBox.warning(self, "Input Error", f"A trade named '{name}' already exists.")
+            return
+
+        def trade_added(_):
+            QMessageBox.information(self, "Success", f"Trade '{name}' added.")
+
+        self.db.submit_query("INSERT INTO trades (name) VALUES (?)", (name,), on_done=trade_added)
+
+    def add_crew(self):
+        name, ok = QInputDialog.getText(self, "New Crew", "Crew name:")
+        name = name.strip()
+        if not ok or not name:
+            return
+        if self.db.fetch_data("SELECT 1 FROM crews WHERE name = ?", (name,)):
+            QMessageBox.warning(self, "Input Error", f"A crew named '{name}' already exists.")
+            return
+
+        no_trade = "(No Trade)"
+        trades = dict(self.db.fetch_data("SELECT name, id FROM trades ORDER BY name"))
+        trade, ok = QInputDialog.getItem(self, "New Crew", f"Trade of crew '{name}':", [no_trade] + list(trades), 0, False)
+        if not ok:
+            return
+
+        def crew_added(_):
+            self.load_crews()
+            QMessageBox.information(self, "Success", f"Crew '{name}' added.")
+
+        self.db.submit_query("INSERT INTO crews (name, trade_id) VALUES (?, ?)", (name, trades.get(trade)), on_done=crew_added)
+
+    def show_log_allocations(self):
+        """Lists how the selected log entry's hours are split across tasks and crews."""
+        allocations = []
+        if self.shown_log_id is not None:
+            allocations = self.db.fetch_data("""
+                SELECT a.id, COALESCE(t.name, 'Task #' || a.task_id), COALESCE(c.name, 'Crew #' || a.crew_id), a.hours
+                FROM log_allocations a
+                LEFT JOIN tasks t ON t.id = a.task_id
+                LEFT JOIN crews c ON c.id = a.crew_id
+                WHERE a.log_id = ? ORDER BY a.id
+            """, (self.shown_log_id,))
+
+        self.allocation_table.setRowCount(len(allocations))
+        for row, (allocation_id, task, crew, hours) in enumerate(allocations):
+            self.allocation_table.setItem(row, 0, QTableWidgetItem(str(allocation_id)))
+            self.allocation_table.setItem(row, 1, QTableWidgetItem(task))
+            self.allocation_table.setItem(row, 2, QTableWidgetItem(crew))
+            self.allocation_table.setItem(row, 3, QTableWidgetItem(f"{hours:.1f}"))
+
+    def allocate_hours(self):
+        """Attributes part of the selected log entry's hours to a task and crew."""
+        log_id = self.selected_log_id()
+        task_id = self.allocation_task_combo.currentData()
+        crew_id = self.allocation_crew_combo.currentData()
+
+        if log_id is None:
+            QMessageBox.warning(self, "Selection Error", "Please select a log entry to allocate hours from.")
+            return
+        if task_id is None or crew_id is None:
+            QMessageBox.warning(self, "Input Error", "Choose a task and a crew (add crews with 'New Crew...').")
+            return
+
+        try:
+            hours = float(self.allocation_hours_input.text().strip())
+            if hours <= 0:
+                raise ValueError
+        except ValueError:
+            QMessageBox.warning(self, "Input Error", "Hours must be a positive number.")
+            return
+
+        def insert_allocation(conn):
+            # Checked inside the write transaction, so allocations still queued or made by a quick
+            # second click are counted before this one is added
+            found, logged, allocated = conn.execute("""
+                SELECT l.id, l.hours_worked, COALESCE(SUM(a.hours), 0)
+                FROM daily_log l LEFT JOIN log_allocations a ON a.log_id = l.id
+                WHERE l.id = ?
+            """, (log_id,)).fetchone()
+            if found is None or (logged is not None and allocated + hours > logged + 1e-9):
+                return None, found, logged, allocated
+            allocation_id = conn.execute(
+                "INSERT INTO log_allocations (log_id, task_id, crew_id, hours) VALUES (?, ?, ?, ?)",
+                (log_id, task_id, crew_id, hours)
+            ).lastrowid
+            return allocation_id, found, logged, allocated
+
+        def hours_allocated(outcome):
+            allocation_id, found, logged, allocated = outcome
+            if found is None:
+                QMessageBox.warning(self, "Constraint Violation", "This log entry no longer exists.")
+                self.show_log_allocations()
+                return
+            if allocation_id is None:
+                QMessageBox.warning(self, "Constraint Violation",
+                    f"Only {logged - allocated:.1f} of the {logged:.1f} hours logged in this entry are left to allocate."
+                )
+                return
+            self.allocation_hours_input.clear()
+            self.show_log_allocations()
+            self.labour_changed()
+
+        self.db.submit_call(insert_allocation, on_done=hours_allocated)
+
+    def remove_allocation(self):
+        selected_rows = self.allocation_table.selectionModel().selectedRows()
+        if not selected_rows:
+            QMessageBox.warning(self, "Selection Error", "Please select an allocation to remove.")
+            return
+        allocation_id = int(self.allocation_table.item(selected_rows[0].row(), 0).text())
+
+        def allocation_removed(_):
+            self.show_log_allocations()
+            self.labour_changed()
+
+        self.db.submit_query("DELETE FROM log_allocations WHERE id = ?", (allocation_id,), on_done=allocation_removed)
 
     # reports 
 
@@ -596,20 +1191,50 @@ class ProjectDashboard(QDialog):
         
         report_layout.addWidget(summary_widget)
         report_layout.addWidget(self.create_separator())
+
+        # Where the labour went, from the incrementally maintained labour_rollup table
+        labour_header = QHBoxLayout()
+        labour_header.addWidget(QLabel("<h3>Labour Breakdown</h3>"))
+        labour_header.addWidget(QLabel("By:"))
+        self.labour_breakdown_combo = QComboBox()
+        self.labour_breakdown_combo.addItems(list(LABOUR_BREAKDOWN_QUERIES))
+        self.labour_breakdown_combo.currentTextChanged.connect(self.load_labour_breakdown)
+        labour_header.addWidget(self.labour_breakdown_combo)
+        labour_header.addStretch(1)
+        self.allocated_hours_label = QLabel("")
+        labour_header.addWidget(self.allocated_hours_label)
+        report_layout.addLayout(labour_header)
+
+        self.labour_table = QTableWidget()
+        self.labour_table.setColumnCount(3)
+        self.labour_table.setHorizontalHeaderLabels(['', 'Hours', 'Share'])
+        self.labour_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.labour_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeToContents)
+        self.labour_table.horizontalHeader().setSectionResizeMode(2, QHeaderView.ResizeToContents)
+        self.labour_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        report_layout.addWidget(self.labour_table)
+        report_layout.addWidget(self.create_separator())
+
+        export_btn = QPushButton("Export Project Data")
+        export_btn.setStyleSheet("background-color: #666666; color: white; padding: 8px;")
+        export_btn.clicked.connect(self.export_project_data)
+        report_layout.addWidget(export_btn)
+
+        save_template_btn = QPushButton("Save Project as Template")
+        save_template_btn.setStyleSheet("background-color: #0b5394; color: white; padding: 8px;")
+        save_template_btn.clicked.connect(self.save_as_template)
+        report_layout.addWidget(save_template_btn)
         report_layout.addStretch(1) # Push content to the top
 
         self.tabs.addTab(report_tab, "Reports")
 
     def update_reports(self):
-        """Calculates and updates all report labels (FR3.3)."""
+        """Calculates and updates all report labels from the project snapshot (FR3.3)."""
         
         # Completion Percentage (Based on Tasks)
 
-        total_tasks_query = "SELECT COUNT(*) FROM tasks WHERE project_id = ?"
-        completed_tasks_query = "SELECT COUNT(*) FROM tasks WHERE project_id = ? AND status = 'Complete'"
-        
-        total_tasks = self.db.fetch_data(total_tasks_query, (self.project_id,))[0][0]
-        completed_tasks = self.db.fetch_data(completed_tasks_query, (self.project_id,))[0][0]
+        total_tasks = len(self.snapshot.tasks)
+        completed_tasks = self.snapshot.completed_task_count()
         
         if total_tasks > 0:
             completion_percent = (completed_tasks / total_tasks) * 100
@@ -620,11 +1245,14 @@ class ProjectDashboard(QDialog):
         self.completion_label.setText(f"{completion_percent:.1f}%")
         
         
-        if completion_percent == 100 and total_tasks > 0:
+        completed = completion_percent == 100 and total_tasks > 0
+        if completed:
             status = "Completed"
             status_style = "color: green; font-weight: bold;"
             
-            self.db.execute_query("UPDATE projects SET status = 'Completed' WHERE id = ?", (self.project_id,))
+            # Written once when the project reaches 100%, not on every refresh
+            if not self.completion_recorded:
+                self.db.submit_query("UPDATE projects SET status = 'Completed' WHERE id = ? AND status != 'Completed'", (self.project_id,))
         elif completion_percent > 0:
             status = "In Progress"
             status_style = "color: orange; font-weight: bold;"
@@ -634,18 +1262,76 @@ class ProjectDashboard(QDialog):
             
         self.status_label.setText(status)
         self.status_label.setStyleSheet(status_style)
+        self.completion_recorded = completed
 
 
        
-        hours_query = "SELECT SUM(hours_worked) FROM daily_log WHERE project_id = ?"
-        total_hours = self.db.fetch_data(hours_query, (self.project_id,))[0][0] or 0.0
+        total_hours = self.snapshot.total_hours()
         self.total_hours_label.setText(f"{total_hours:.1f} hours")
         
        
-        cost_query = "SELECT SUM(quantity * unit_cost) FROM materials WHERE project_id = ?"
-        total_cost = self.db.fetch_data(cost_query, (self.project_id,))[0][0] or 0.0
+        total_cost = self.snapshot.material_cost()
         self.total_cost_label.setText(f"Rs.{total_cost:,.2f}")
 
+        self.load_labour_breakdown()
+
+    def labour_changed(self):
+        """Drops the cached labour breakdowns after allocations changed and redraws the reports."""
+        self.labour_rows.clear()
+        self.update_reports()
+
+    def load_labour_breakdown(self, *_):
+        """Fills the labour breakdown table for the chosen grouping (task, crew, trade or week)."""
+        by = self.labour_breakdown_combo.currentText()
+        rows = self.labour_rows.get(by)
+        if rows is None:
+            rows = self.labour_rows[by] = labour_breakdown(self.db.conn, self.project_id, by)
+        allocated = sum(hours for _, hours in rows)
+
+        self.labour_table.setHorizontalHeaderLabels([by, 'Hours', 'Share'])
+        self.labour_table.setRowCount(len(rows))
+        for row, (label, hours) in enumerate(rows):
+            share = hours / allocated * 100 if allocated else 0
+            self.labour_table.setItem(row, 0, QTableWidgetItem(label))
+            self.labour_table.setItem(row, 1, QTableWidgetItem(f"{hours:.1f}"))
+            self.labour_table.setItem(row, 2, QTableWidgetItem(f"{share:.1f}%"))
+
+        self.allocated_hours_label.setText(f"Allocated {allocated:.1f} of {self.snapshot.total_hours():.1f} hours logged")
+
+
+    def export_project_data(self):
+        """Exports this project's tasks, materials, logs and report metrics to a folder."""
+        fmt, ok = QInputDialog.getItem(self, "Export Format", "Choose an export format:", list(EXPORT_FORMATS), 0, False)
+        if not ok:
+            return
+
+        directory = QFileDialog.getExistingDirectory(self, "Choose Export Folder")
+        if not directory:
+            return
+
+        try:
+            written = DataExporter(self.db).export(directory, fmt, self.project_id)
+        except (OSError, sqlite3.Error) as e:
+            QMessageBox.critical(self, "Export Error", f"Export failed: {e}")
+            return
+
+        total_rows = sum(written.values())
+        QMessageBox.information(self, "Export Complete", f"Exported {total_rows} rows into {len(written)} files in {directory}.")
+
+    def save_as_template(self):
+        """Saves this project's tasks and materials as a reusable template."""
+        name, ok = QInputDialog.getText(self, "Save as Template", "Template name:", text=self.project_name)
+        name = name.strip()
+        if not ok or not name:
+            return
+
+        def template_saved(_):
+            QMessageBox.information(self, "Success", f"Template '{name}' saved.")
+
+        self.db.submit_call(
+            lambda conn: save_project_as_template(conn, self.project_id, name),
+            on_done=template_saved
+        )
 
     # funtions
 
@@ -656,8 +1342,11 @@ class ProjectDashboard(QDialog):
         separator.setStyleSheet("background-color: #cccccc;")
         return separator
 
-    def closeEvent(self, event):
-       
-        self.finished.emit()
-        event.accept()
+    def done(self, result):
+        # Every way of closing the dialog ends here: the close button (QDialog.closeEvent calls reject()),
+        # Esc and accept/reject. done() also emits finished, which brings back the project list.
+        self.watcher.stop()
+        self.thumbnails.stop()
+        self.file_worker.shutdown(wait=False)
+        super().done(result)
 
@@ -0,0 +1,251 @@
+from array import array
+from datetime import date
+
+TASK_STATUSES = ('Not Started', 'In Progress', 'Complete')
+
+# julianday() minus this gives date.toordinal(), so day numbers can be computed in SQL
+JULIAN_DAY_OFFSET = 1721424.5
+
+TASK_DATE_COLUMNS = ('planned_start', 'planned_end', 'actual_start', 'actual_end')
+
+
+def status_code(status):
+    return TASK_STATUSES.index(status) if status in TASK_STATUSES else 0
+
+
+def day_number(iso_date):
+    """ISO date text -> day number (date ordinal); 0 stands for "no date"."""
+    return date.fromisoformat(iso_date).toordinal() if iso_date else 0
+
+
+def iso_date(day):
+    """Day number -> ISO date text, or None for 0."""
+    return date.fromordinal(day).isoformat() if day else None
+
+
+class ColumnStore:
+    """
+    Rows stored column by column: numbers in typed arrays, text in plain lists.
+    `fields` lists (attribute, array typecode or None for a list); the first field is the row id.
+    """
+    __slots__ = ('index',)
+    fields = ()
+
+    def __init__(self):
+        self.index = {}
+        for name, typecode in self.fields:
+            setattr(self, name, array(typecode) if typecode else [])
+
+    def __len__(self):
+        return len(self.index)
+
+    def append(self, *values):
+        pos = self.index.get(values[0])
+        if pos is not None:
+            # Already present (e.g. picked up by a reload first): update in place
+            for (name, _), value in zip(self.fields, values):
+                getattr(self, name)[pos] = value
+            return
+        self.index[values[0]] = len(self.index)
+        for (name, _), value in zip(self.fields, values):
+            getattr(self, name).append(value)
+
+    def extend(self, rows):
+        for row in rows:
+            self.append(*row)
+
+    def remove(self, row_ids):
+        drop = {self.index[row_id] for row_id in row_ids if row_id in self.index}
+        if not drop:
+            return
+        for name, typecode in self.fields:
+            kept = [value for pos, value in enumerate(getattr(self, name)) if pos not in drop]
+            setattr(self, name, array(typecode, kept) if typecode else kept)
+        self.index = {row_id: pos for pos, row_id in enumerate(self.ids)}
+
+    def clear(self):
+        self.__init__()
+
+
+class TaskColumns(ColumnStore):
+    __slots__ = ('ids', 'names', 'statuses', 'prereq_ids') + TASK_DATE_COLUMNS
+    # statuses hold TASK_STATUSES positions, prereq_ids use 0 for "no prerequisite",
+    # dates are day numbers with 0 for "not set"
+    fields = (('ids', 'q'), ('names', None), ('statuses', 'b'), ('prereq_ids', 'q')) + tuple(
+        (column, 'l') for column in TASK_DATE_COLUMNS
+    )
+
+
+class MaterialColumns(ColumnStore):
+    __slots__ = ('ids', 'names', 'quantities', 'unit_costs', 'thresholds')
+    fields = (('ids', 'q'), ('names', None), ('quantities', 'd'), ('unit_costs', 'd'), ('thresholds', 'd'))
+
+
+class LogColumns(ColumnStore):
+    __slots__ = ('ids', 'dates', 'hours', 'descriptions')
+    fields = (('ids', 'q'), ('dates', None), ('hours', 'd'), ('descriptions', None))
+
+
+class ProjectSnapshot:
+    """
+    In-memory copy of one project's tasks, materials and daily logs, shared by all dashboard tabs.
+    It is loaded once in bulk and then updated in place as the dashboard's own writes complete,
+    so tabs and report figures never have to query the database again.
+    Daily logs are only held for the selected date range (log_range); the project-wide
+    hour total is kept separately so reports stay correct whatever the range.
+    """
+    __slots__ = ('project_id', 'tasks', 'materials', 'logs', 'log_range', 'logged_hours')
+
+    def __init__(self, project_id):
+        self.project_id = project_id
+        self.tasks = TaskColumns()
+        self.materials = MaterialColumns()
+        self.logs = LogColumns()
+        self.log_range = (None, None)
+        self.logged_hours = 0.0
+
+    @classmethod
+    def load(cls, db, project_id, log_range=(None, None)):
+        snapshot = cls(project_id)
+        snapshot.load_tasks(db)
+        snapshot.load_materials(db)
+        snapshot.load_logs(db, *log_range)
+        snapshot.load_logged_hours(db)
+        return snapshot
+
+    def load_tasks(self, db):
+        self.tasks.clear()
+        days = ", ".join(
+            f"COALESCE(CAST(julianday({column}) - {JULIAN_DAY_OFFSET} AS INTEGER), 0)" for column in TASK_DATE_COLUMNS
+        )
+        query = f"SELECT id, name, status, COALESCE(prerequisite_task_id, 0), {days} FROM tasks WHERE project_id = ? ORDER BY id"
+        for rows in db.iter_data(query, (self.project_id,)):
+            for task_id, name, status, prereq_id, *task_days in rows:
+                self.tasks.append(task_id, name, status_code(status), prereq_id, *task_days)
+
+    def load_materials(self, db):
+        self.materials.clear()
+        query = """
+        SELECT id, name, COALESCE(quantity, 0), COALESCE(unit_cost, 0), COALESCE(alert_threshold, 0)
+        FROM materials WHERE project_id = ? ORDER BY id
+        """
+        for rows in db.iter_data(query, (self.project_id,)):
+            self.materials.extend(rows)
+
+    def load_logs(self, db, start=None, end=None):
+        """Loads the logs dated between start and end (ISO dates, inclusive; None leaves that side open)."""
+        self.logs.clear()
+        self.log_range = (start, end)
+
+        # Served by the (project_id, log_date) index, so only rows inside the range are read
+        query = "SELECT id, log_date, COALESCE(hours_worked, 0), description FROM daily_log WHERE project_id = ?"
+        params = [self.project_id]
+        if start is not None:
+            query += " AND log_date >= ?"
+            params.append(start)
+        if end is not None:
+            query += " AND log_date <= ?"
+            params.append(end)
+        query += " ORDER BY log_date DESC"
+
+        for rows in db.iter_data(query, params):
+            self.logs.extend(rows)
+
+    def load_logged_hours(self, db):
+        """
+        Reads the project-wide hour total. Changing the log range does not touch it (that would
+        read every log row again); add_log and remove_logs keep it current afterwards.
+        """
+        hours_query = "SELECT COALESCE(SUM(hours_worked), 0) FROM daily_log WHERE project_id = ?"
+        self.logged_hours = db.fetch_data(hours_query, (self.project_id,))[0][0]
+
+    # Tasks
+
+    def add_task(self, task_id, name, prereq_id=None, status='Not Started', planned_start=None, planned_end=None):
+        self.tasks.append(
+            task_id, name, status_code(status), prereq_id or 0,
+            day_number(planned_start), day_number(planned_end), 0, 0
+        )
+
+    def set_task_status(self, task_ids, status, today=None):
+        """Mirrors update_task_status: starting a task stamps actual_start, completing it stamps actual_end."""
+        code = status_code(status)
+        today = day_number(today) if today else date.today().toordinal()
+        tasks = self.tasks
+        for task_id in task_ids:
+            pos = tasks.index.get(task_id)
+            if pos is None:
+                continue
+            tasks.statuses[pos] = code
+            if status in ('In Progress', 'Complete') and not tasks.actual_start[pos]:
+                tasks.actual_start[pos] = today
+            if status == 'Complete':
+                tasks.actual_end[pos] = today
+
+    def set_planned_dates(self, task_ids, planned_start, planned_end):
+        start, end = day_number(planned_start), day_number(planned_end)
+        tasks = self.tasks
+        for task_id in task_ids:
+            pos = tasks.index.get(task_id)
+            if pos is not None:
+                tasks.planned_start[pos] = start
+                tasks.planned_end[pos] = end
+
+    def planned_duration(self, pos):
+        """Planned length in days (inclusive), or None if either planned date is missing."""
+        start, end = self.tasks.planned_start[pos], self.tasks.planned_end[pos]
+        return end - start + 1 if start and end else None
+
+    def remove_tasks(self, task_ids):
+        self.tasks.remove(task_ids)
+
+    def task_name(self, task_id):
+        pos = self.tasks.index.get(task_id)
+        return self.tasks.names[pos] if pos is not None else None
+
+    def task_status(self, pos):
+        return TASK_STATUSES[self.tasks.statuses[pos]]
+
+    def completed_task_count(self):
+        return self.tasks.statuses.count(TASK_STATUSES.index('Complete'))
+
+    # Materials
+
+    def add_material(self, material_id, name, quantity, unit_cost, threshold):
+        self.materials.append(material_id, name, quantity, unit_cost, threshold)
+
+    def set_material_quantity(self, material_id, quantity):
+        pos = self.materials.index.get(material_id)
+        if pos is not None:
+            self.materials.quantities[pos] = quantity
+
+    def remove_materials(self, material_ids):
+        self.materials.remove(material_ids)
+
+    def material_cost(self):
+        return sum(q * c for q, c in zip(self.materials.quantities, self.materials.unit_costs))
+
+    def low_stock_materials(self):
+        m = self.materials
+        return sorted(m.names[pos] for pos in range(len(m)) if m.quantities[pos] <= m.thresholds[pos])
+
+    # Daily logs
+
+    def in_log_range(self, log_date):
+        start, end = self.log_range
+        return (start is None or log_date >= start) and (end is None or log_date <= end)
+
+    def add_log(self, log_id, log_date, hours, description):
+        self.logged_hours += hours
+        if self.in_log_range(log_date):
+            self.logs.append(log_id, log_date, hours, description)
+
+    def remove_logs(self, log_ids):
+        for log_id in log_ids:
+            pos = self.logs.index.get(log_id)
+            if pos is not None:
+                self.logged_hours -= self.logs.hours[pos]
+        self.logs.remove(log_ids)
+
+    def total_hours(self):
+        return self.logged_hours
@@ -0,0 +1,122 @@
+def install_template_tables(conn):
+    """Creates the tables holding reusable task graphs and material lists."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS templates (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS template_tasks (
+            id INTEGER PRIMARY KEY,
+            template_id INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            prerequisite_task_id INTEGER,
+            planned_start_offset INTEGER,
+            planned_end_offset INTEGER,
+            FOREIGN KEY (template_id) REFERENCES templates(id)
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS template_materials (
+            id INTEGER PRIMARY KEY,
+            template_id INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            quantity REAL DEFAULT 0,
+            unit_cost REAL DEFAULT 0.0,
+            alert_threshold REAL DEFAULT 0,
+            FOREIGN KEY (template_id) REFERENCES templates(id)
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_template_tasks_template ON template_tasks(template_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_template_materials_template ON template_materials(template_id)")
+
+
+def list_templates(conn):
+    """Returns (id, name, task_count) for every saved template."""
+    return conn.execute("""
+        SELECT t.id, t.name, (SELECT COUNT(*) FROM template_tasks tt WHERE tt.template_id = t.id)
+        FROM templates t ORDER BY t.name
+    """).fetchall()
+
+
+def id_offset(conn, target_table, source_table, source_filter, params):
+    """
+    Offset that moves a block of source ids just past the highest id in target_table.
+    Copying rows as id + offset keeps every id unique and lets prerequisite links be
+    remapped with the same arithmetic, so the whole task graph copies in one statement.
+    """
+    return conn.execute(f"""
+        SELECT COALESCE((SELECT MAX(id) FROM {target_table}), 0) + 1
+             - COALESCE((SELECT MIN(id) FROM {source_table} WHERE {source_filter}), 0)
+    """, params).fetchone()[0]
+
+
+def save_project_as_template(conn, project_id, name):
+    """
+    Copies a project's tasks and materials into a new template. Returns the template id.
+    Planned task dates are kept as day offsets from the project's start date (or from its
+    earliest planned start when the project has none), so clones can be rescheduled.
+    Runs inside the caller's transaction (e.g. DatabaseManager.submit_call).
+    """
+    template_id = conn.execute("INSERT INTO templates (name) VALUES (?)", (name,)).lastrowid
+
+    offset = id_offset(conn, 'template_tasks', 'tasks', 'project_id = ?', (project_id,))
+    # Prerequisites outside the project cannot be carried over and are dropped
+    conn.execute("""
+        WITH anchor AS (
+            SELECT julianday(COALESCE(
+                (SELECT start_date FROM projects WHERE id = :project_id),
+                (SELECT MIN(planned_start) FROM tasks WHERE project_id = :project_id)
+            )) AS day
+        )
+        INSERT INTO template_tasks (id, template_id, name, prerequisite_task_id, planned_start_offset, planned_end_offset)
+        SELECT t.id + :offset, :template_id, t.name, p.id + :offset,
+               CAST(julianday(t.planned_start) - anchor.day AS INTEGER),
+               CAST(julianday(t.planned_end) - anchor.day AS INTEGER)
+        FROM tasks t
+        CROSS JOIN anchor
+        LEFT JOIN tasks p ON p.id = t.prerequisite_task_id AND p.project_id = t.project_id
+        WHERE t.project_id = :project_id
+    """, {'offset': offset, 'template_id': template_id, 'project_id': project_id})
+
+    conn.execute("""
+        INSERT INTO template_materials (template_id, name, quantity, unit_cost, alert_threshold)
+        SELECT ?, name, quantity, unit_cost, alert_threshold
+        FROM materials WHERE project_id = ?
+    """, (template_id, project_id))
+
+    return template_id
+
+
+def create_project_from_template(conn, template_id, name, start_date, end_date):
+    """
+    Creates a project and fills it with the template's tasks and materials. Returns the project id.
+    Planned task dates are laid out from start_date; without a start date they are left unset.
+    Runs inside the caller's transaction (e.g. DatabaseManager.submit_call).
+    """
+    project_id = conn.execute(
+        "INSERT INTO projects (name, start_date, end_date) VALUES (?, ?, ?)", (name, start_date, end_date)
+    ).lastrowid
+
+    offset = id_offset(conn, 'tasks', 'template_tasks', 'template_id = ?', (template_id,))
+    conn.execute("""
+        INSERT INTO tasks (id, project_id, name, prerequisite_task_id, planned_start, planned_end)
+        SELECT id + :offset, :project_id, name, prerequisite_task_id + :offset,
+               CASE WHEN planned_start_offset IS NOT NULL
+                    THEN date(:start_date, printf('%+d days', planned_start_offset)) END,
+               CASE WHEN planned_end_offset IS NOT NULL
+                    THEN date(:start_date, printf('%+d days', planned_end_offset)) END
+        FROM template_tasks WHERE template_id = :template_id
+        ORDER BY id
+    """, {'offset': offset, 'project_id': project_id, 'template_id': template_id, 'start_date': start_date})
+
+    conn.execute("""
+        INSERT INTO materials (project_id, name, quantity, unit_cost, alert_threshold)
+        SELECT ?, name, quantity, unit_cost, alert_threshold
+        FROM template_materials WHERE template_id = ?
+        ORDER BY id
+    """, (project_id, template_id))
+
+    return project_id
@@ -0,0 +1,112 @@
+from attachments import install_attachment_tables
+from date_utils import parse_legacy_date
+from labour import install_labour_tables
+from project_templates import install_template_tables
+
+# Bumped whenever migrate_schema gains a step or a table is added; stored in PRAGMA user_version
+SCHEMA_VERSION = 6
+
+# Latest change_log entry; lets the writer report which entries its own commits produced
+CHANGE_SEQUENCE_QUERY = "SELECT COALESCE(MAX(seq), 0) FROM change_log"
+
+
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def create_tables(conn):
+    """Creates every table, index and trigger the application uses, then upgrades older data. Does not commit."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS projects (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE,
+            start_date TEXT,
+            end_date TEXT,
+            status TEXT DEFAULT 'Active'
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS tasks (
+            id INTEGER PRIMARY KEY,
+            project_id INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            status TEXT DEFAULT 'Not Started',
+            prerequisite_task_id INTEGER,
+            planned_start TEXT,
+            planned_end TEXT,
+            actual_start TEXT,
+            actual_end TEXT,
+            FOREIGN KEY (project_id) REFERENCES projects(id)
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS materials (
+            id INTEGER PRIMARY KEY,
+            project_id INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            quantity REAL DEFAULT 0,
+            unit_cost REAL DEFAULT 0.0,
+            alert_threshold REAL DEFAULT 0,
+            FOREIGN KEY (project_id) REFERENCES projects(id)
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS daily_log (
+            id INTEGER PRIMARY KEY,
+            project_id INTEGER NOT NULL,
+            log_date TEXT NOT NULL,
+            description TEXT,
+            hours_worked REAL,
+            FOREIGN KEY (project_id) REFERENCES projects(id)
+        )
+    """)
+
+    # Per-project lookups (dashboard tabs, exports) should not scan whole tables
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_project ON tasks(project_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_materials_project ON materials(project_id)")
+    # Date-range filters on the Daily Log tab are index range scans
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_daily_log_project_date ON daily_log(project_id, log_date)")
+
+    # Change log used to sync offline site laptops (imported here: most launches skip create_tables)
+    from change_sync import install_change_capture
+    install_change_capture(conn)
+    install_template_tables(conn)
+    install_attachment_tables(conn)
+    install_labour_tables(conn)
+
+    migrate_schema(conn)
+
+
+def migrate_schema(conn):
+    """Upgrades data written by older versions of the application."""
+    version = schema_version(conn)
+
+    if version < 1:
+        # Dates used to be free text: store them as zero-padded ISO so they sort and range-scan
+        # correctly. Unreadable project dates (including the "YYYY-MM-DD" placeholder) become NULL;
+        # unreadable log dates are left as they are rather than losing the entry.
+        conn.create_function("legacy_date", 1, parse_legacy_date, deterministic=True)
+        for column in ('start_date', 'end_date'):
+            conn.execute(f"UPDATE projects SET {column} = legacy_date({column}) WHERE {column} IS NOT legacy_date({column})")
+        conn.execute("""
+            UPDATE daily_log SET log_date = legacy_date(log_date)
+            WHERE legacy_date(log_date) IS NOT NULL AND log_date != legacy_date(log_date)
+        """)
+        conn.execute("DROP INDEX IF EXISTS idx_daily_log_project")
+
+    if version < 2:
+        # Planned and actual dates for the Gantt schedule (ISO text, like every other date)
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(tasks)").fetchall()]
+        for column in ('planned_start', 'planned_end', 'actual_start', 'actual_end'):
+            if column not in columns:
+                conn.execute(f"ALTER TABLE tasks ADD COLUMN {column} TEXT")
+
+    if version < 6:
+        # Templates keep planned task dates as day offsets from the project start
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(template_tasks)").fetchall()]
+        for column in ('planned_start_offset', 'planned_end_offset'):
+            if column not in columns:
+                conn.execute(f"ALTER TABLE template_tasks ADD COLUMN {column} INTEGER")
+
+    if version < SCHEMA_VERSION:
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
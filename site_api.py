@@ -0,0 +1,359 @@
+"""
+Local HTTP/JSON service for site tablets, running over the same database as the desktop app.
+
+    python site_api.py --db project_manager.db --port 8765
+
+The write endpoints have no authentication, so the service only listens on this computer
+(127.0.0.1) unless --host is given, e.g. --host 0.0.0.0 to reach it from the site Wi-Fi.
+
+Reads run on a small pool of threads, each with its own read-only connection, so slow
+queries never stall the event loop. Writes go through one WriteQueue, which commits
+concurrent requests together and leaves the desktop app's connections free between commits
+(the database is in WAL mode). Edits show up in open dashboards through their ChangeWatcher.
+
+Endpoints:
+    GET  /projects
+    GET  /projects/<id>/tasks
+    GET  /projects/<id>/materials
+    GET  /projects/<id>/logs?from=YYYY-MM-DD&to=YYYY-MM-DD
+    GET  /projects/<id>/report
+    GET  /report
+    POST /projects/<id>/logs     {"log_date": "...", "hours_worked": 8.0, "description": "..."}
+    POST /tasks/status           {"task_ids": [1, 2], "status": "Complete"}
+"""
+import argparse
+import asyncio
+import json
+import math
+import re
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, parse_qs
+
+from data_export import EXPORT_TABLES, PROJECT_REPORT_METRICS_QUERY, REPORT_COLUMNS, REPORT_METRICS_QUERY
+from date_utils import normalize_date
+from project_snapshot import TASK_STATUSES
+from schema import SCHEMA_VERSION, schema_version
+from task_status import PREREQUISITE_VIOLATIONS_QUERY, SET_STATUS_QUERY
+from write_queue import WriteQueue
+
+PROJECT_COLUMNS = ['id', 'name', 'start_date', 'end_date', 'status']
+
+MAX_BODY_BYTES = 1024 * 1024
+IDLE_TIMEOUT = 30.0
+
+REASONS = {
+    200: 'OK', 201: 'Created', 400: 'Bad Request', 404: 'Not Found',
+    405: 'Method Not Allowed', 409: 'Conflict', 413: 'Payload Too Large', 500: 'Internal Server Error',
+}
+
+
+class ApiError(Exception):
+    """Turned into a JSON error response with the given HTTP status."""
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class SiteApiServer:
+    """
+    asyncio HTTP/1.1 server (keep-alive, JSON bodies) for the site tablet endpoints.
+    Pass port=0 to listen on a free port; the chosen one is returned by start().
+    """
+    def __init__(self, db_name, host='127.0.0.1', port=8765, readers=4):
+        self.db_name = db_name
+        self.host = host
+        self.port = port
+        self.check_schema()
+
+        self.readers = ThreadPoolExecutor(max_workers=readers, thread_name_prefix='api-reader')
+        self.reader_local = threading.local()
+        self.reader_conns = []
+        self.conns_lock = threading.Lock()
+        self.writer = WriteQueue(db_name)
+        self.server = None
+
+        self.routes = [
+            ('GET', re.compile(r'/projects'), self.list_projects),
+            ('GET', re.compile(r'/projects/(\d+)/tasks'), self.list_tasks),
+            ('GET', re.compile(r'/projects/(\d+)/materials'), self.list_materials),
+            ('GET', re.compile(r'/projects/(\d+)/logs'), self.list_logs),
+            ('POST', re.compile(r'/projects/(\d+)/logs'), self.add_log),
+            ('GET', re.compile(r'/projects/(\d+)/report'), self.project_report),
+            ('GET', re.compile(r'/report'), self.portfolio_report),
+            ('POST', re.compile(r'/tasks/status'), self.set_task_status),
+        ]
+
+    def check_schema(self):
+        conn = sqlite3.connect(self.db_name)
+        try:
+            version = schema_version(conn)
+        finally:
+            conn.close()
+        # Older schemas lack columns the endpoints read (e.g. task dates); the desktop app upgrades them
+        if version < SCHEMA_VERSION:
+            raise SystemExit(f"{self.db_name} has not been set up for this version yet. Open it once with the desktop application first.")
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle_client, self.host, self.port, backlog=512)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def close(self):
+        """Stops accepting connections, then flushes queued writes and closes every connection."""
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        await asyncio.get_running_loop().run_in_executor(None, self.writer.close)
+        self.readers.shutdown(wait=True)
+        with self.conns_lock:
+            for conn in self.reader_conns:
+                conn.close()
+            self.reader_conns.clear()
+
+    # Connection handling
+
+    async def handle_client(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request_line = await asyncio.wait_for(reader.readline(), IDLE_TIMEOUT)
+                except asyncio.TimeoutError:
+                    break
+                if not request_line:
+                    break
+
+                parts = request_line.decode('latin-1').split()
+                if len(parts) != 3:
+                    await self.respond(writer, 400, {'error': 'Malformed request line.'}, keep_alive=False)
+                    break
+                method, target, version = parts
+
+                headers = {}
+                while True:
+                    line = await asyncio.wait_for(reader.readline(), IDLE_TIMEOUT)
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                try:
+                    length = int(headers.get('content-length', 0))
+                except ValueError:
+                    length = -1
+                if not 0 <= length <= MAX_BODY_BYTES:
+                    await self.respond(writer, 413, {'error': 'Request body is too large.'}, keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+
+                connection = headers.get('connection', '').lower()
+                keep_alive = connection == 'keep-alive' if version == 'HTTP/1.0' else connection != 'close'
+
+                status, payload = await self.dispatch(method, target, body)
+                await self.respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.TimeoutError, ValueError):
+            # Client went away, stalled mid-request, or sent an oversized header line
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def respond(self, writer, status, payload, keep_alive):
+        body = json.dumps(payload).encode('utf-8')
+        head = (
+            f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+            "Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode('latin-1') + body)
+        await writer.drain()
+
+    async def dispatch(self, method, target, body):
+        url = urlsplit(target)
+        path = url.path.rstrip('/') or '/'
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+
+        path_matched = False
+        for route_method, pattern, handler in self.routes:
+            match = pattern.fullmatch(path)
+            if not match:
+                continue
+            path_matched = True
+            if route_method != method:
+                continue
+            try:
+                data = json.loads(body) if body else {}
+                if not isinstance(data, dict):
+                    raise ApiError(400, "Request body must be a JSON object.")
+                args = [int(value) for value in match.groups()]
+                return await handler(query, data, *args)
+            except ApiError as e:
+                return e.status, {'error': str(e)}
+            except json.JSONDecodeError:
+                return 400, {'error': 'Request body is not valid JSON.'}
+            except sqlite3.Error as e:
+                return 500, {'error': f"Database error: {e}"}
+            except Exception as e:
+                return 500, {'error': f"Internal error: {e}"}
+
+        if path_matched:
+            return 405, {'error': f"{method} is not supported on {path}."}
+        return 404, {'error': f"No endpoint at {path}."}
+
+    # Reads and writes
+
+    def reader_conn(self):
+        conn = getattr(self.reader_local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_name, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA query_only = ON")
+            self.reader_local.conn = conn
+            with self.conns_lock:
+                self.reader_conns.append(conn)
+        return conn
+
+    async def read(self, query, params=()):
+        """Runs a SELECT on the reader pool and returns all rows."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.readers, lambda: self.reader_conn().execute(query, params).fetchall())
+
+    async def write(self, func):
+        """Runs func(conn) as one atomic unit on the batched writer and returns its result."""
+        return await asyncio.wrap_future(self.writer.submit_call(func))
+
+    async def require_project(self, project_id):
+        if not await self.read("SELECT 1 FROM projects WHERE id = ?", (project_id,)):
+            raise ApiError(404, f"Project {project_id} does not exist.")
+
+    async def list_table(self, table, project_id, extra_filter='', params=()):
+        await self.require_project(project_id)
+        columns = EXPORT_TABLES[table]
+        rows = await self.read(
+            f"SELECT {', '.join(columns)} FROM {table} WHERE project_id = ?{extra_filter} ORDER BY id",
+            (project_id,) + params
+        )
+        return 200, [dict(zip(columns, row)) for row in rows]
+
+    # Endpoints
+
+    async def list_projects(self, query, data):
+        rows = await self.read(f"SELECT {', '.join(PROJECT_COLUMNS)} FROM projects ORDER BY id")
+        return 200, [dict(zip(PROJECT_COLUMNS, row)) for row in rows]
+
+    async def list_tasks(self, query, data, project_id):
+        return await self.list_table('tasks', project_id)
+
+    async def list_materials(self, query, data, project_id):
+        return await self.list_table('materials', project_id)
+
+    async def list_logs(self, query, data, project_id):
+        extra_filter, params = '', ()
+        try:
+            start = normalize_date(query.get('from', ''))
+            end = normalize_date(query.get('to', ''))
+        except ValueError as e:
+            raise ApiError(400, str(e))
+        # Same (project_id, log_date) index range scan as the Daily Log tab filter
+        if start:
+            extra_filter += " AND log_date >= ?"
+            params += (start,)
+        if end:
+            extra_filter += " AND log_date <= ?"
+            params += (end,)
+        return await self.list_table('daily_log', project_id, extra_filter, params)
+
+    async def project_report(self, query, data, project_id):
+        rows = await self.read(PROJECT_REPORT_METRICS_QUERY, {'project_id': project_id})
+        if not rows:
+            raise ApiError(404, f"Project {project_id} does not exist.")
+        return 200, dict(zip(REPORT_COLUMNS, rows[0]))
+
+    async def portfolio_report(self, query, data):
+        rows = await self.read(REPORT_METRICS_QUERY + " ORDER BY p.id")
+        return 200, [dict(zip(REPORT_COLUMNS, row)) for row in rows]
+
+    async def add_log(self, query, data, project_id):
+        try:
+            log_date = normalize_date(str(data.get('log_date', '')))
+            hours = float(data['hours_worked'])
+        except (KeyError, TypeError, ValueError):
+            raise ApiError(400, "log_date (YYYY-MM-DD) and numeric hours_worked are required.")
+        if log_date is None:
+            raise ApiError(400, "log_date (YYYY-MM-DD) and numeric hours_worked are required.")
+        # float() and json.loads both accept NaN and Infinity, which would poison every hours total
+        if not math.isfinite(hours):
+            raise ApiError(400, "hours_worked must be a finite number.")
+        description = str(data.get('description', '')).strip()
+
+        def insert_log(conn):
+            if conn.execute("SELECT 1 FROM projects WHERE id = ?", (project_id,)).fetchone() is None:
+                raise ApiError(404, f"Project {project_id} does not exist.")
+            return conn.execute(
+                "INSERT INTO daily_log (project_id, log_date, description, hours_worked) VALUES (?, ?, ?, ?)",
+                (project_id, log_date, description, hours)
+            ).lastrowid
+
+        log_id = await self.write(insert_log)
+        return 201, {'id': log_id, 'project_id': project_id, 'log_date': log_date,
+                     'description': description, 'hours_worked': hours}
+
+    async def set_task_status(self, query, data):
+        status = data.get('status')
+        task_ids = data.get('task_ids')
+        if status not in TASK_STATUSES:
+            raise ApiError(400, f"status must be one of: {', '.join(TASK_STATUSES)}.")
+        if not isinstance(task_ids, list) or not task_ids or not all(isinstance(i, int) for i in task_ids):
+            raise ApiError(400, "task_ids must be a non-empty list of task ids.")
+        ids = json.dumps(sorted(set(task_ids)))
+
+        def update_status(conn):
+            # Checked inside the write transaction, so a concurrent edit cannot slip in between
+            found = conn.execute("SELECT COUNT(*) FROM tasks WHERE id IN (SELECT value FROM json_each(?))", (ids,)).fetchone()[0]
+            if found != len(set(task_ids)):
+                raise ApiError(404, "One or more tasks do not exist.")
+            if status == 'Complete':
+                violations = conn.execute(PREREQUISITE_VIOLATIONS_QUERY, {'ids': ids}).fetchall()
+                if violations:
+                    details = "; ".join(f"'{task}' needs '{prereq}'" for task, prereq in violations)
+                    raise ApiError(409, f"Prerequisites must be completed first: {details}")
+            conn.execute(SET_STATUS_QUERY, {'status': status, 'ids': ids})
+            return found
+
+        updated = await self.write(update_status)
+        return 200, {'updated': updated, 'status': status}
+
+
+async def serve(db_name, host, port, readers):
+    api = SiteApiServer(db_name, host, port, readers)
+    bound_port = await api.start()
+    print(f"Site API serving {db_name} on http://{host}:{bound_port} (Ctrl+C to stop)")
+    try:
+        await api.server.serve_forever()
+    finally:
+        await api.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local JSON API for site tablets.")
+    parser.add_argument('--db', default='project_manager.db', help="database file shared with the desktop app")
+    parser.add_argument('--host', default='127.0.0.1',
+                        help="address to listen on (default: this computer only; use 0.0.0.0 for the site Wi-Fi)")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--readers', type=int, default=4, help="number of reader threads")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args.db, args.host, args.port, args.readers))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
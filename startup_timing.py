@@ -0,0 +1,48 @@
+import json
+import platform
+import sys
+import time
+from datetime import datetime
+
+STARTUP_TIMING_FLAG = '--startup-timing'
+STARTUP_TIMING_LOG = 'startup_timing.jsonl'
+
+
+class StartupTimer:
+    """
+    Records how long each startup phase takes, measured from when this module was first imported.
+    mark(phase) closes the phase that has been running since the previous mark. Launch the
+    app with --startup-timing to print the phases and append them as one JSON line to
+    startup_timing.jsonl, so numbers can be compared across releases and machines.
+    """
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.last = self.started
+        self.phases = []
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.phases.append((phase, (now - self.last) * 1000.0))
+        self.last = now
+
+    def enabled(self, argv=None):
+        return STARTUP_TIMING_FLAG in (sys.argv if argv is None else argv)
+
+    def report(self, path=STARTUP_TIMING_LOG):
+        total = (self.last - self.started) * 1000.0
+        lines = [f"  {phase:<14}{ms:9.1f} ms" for phase, ms in self.phases]
+        print("Startup timing:\n" + "\n".join(lines) + f"\n  {'total':<14}{total:9.1f} ms", file=sys.stderr)
+
+        record = {
+            'recorded_at': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'phases_ms': {phase: round(ms, 1) for phase, ms in self.phases},
+            'total_ms': round(total, 1),
+        }
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record) + "\n")
+
+
+# Shared by every module that takes part in startup
+startup_timer = StartupTimer()
@@ -0,0 +1,20 @@
+# Status changes shared by the dashboard and the site API. Task ids are passed as a JSON array.
+
+# Tasks being completed whose prerequisite is neither complete nor being completed in the same batch
+PREREQUISITE_VIOLATIONS_QUERY = """
+SELECT t1.name, t2.name
+FROM tasks t1
+JOIN tasks t2 ON t1.prerequisite_task_id = t2.id
+WHERE t1.id IN (SELECT value FROM json_each(:ids))
+  AND t2.id NOT IN (SELECT value FROM json_each(:ids))
+  AND t2.status != 'Complete'
+"""
+
+# Starting or completing a task records when it actually happened
+SET_STATUS_QUERY = """
+UPDATE tasks SET status = :status,
+    actual_start = CASE WHEN :status IN ('In Progress', 'Complete')
+                        THEN COALESCE(actual_start, date('now', 'localtime')) ELSE actual_start END,
+    actual_end = CASE WHEN :status = 'Complete' THEN date('now', 'localtime') ELSE actual_end END
+WHERE id IN (SELECT value FROM json_each(:ids))
+"""
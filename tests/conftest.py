@@ -0,0 +1,20 @@
+import os
+import sqlite3
+import sys
+
+import pytest
+
+# The application modules live flat in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from schema import create_tables  # noqa: E402
+
+
+@pytest.fixture
+def conn():
+    """An in-memory database with the application's full schema."""
+    conn = sqlite3.connect(':memory:')
+    create_tables(conn)
+    conn.commit()
+    yield conn
+    conn.close()
@@ -0,0 +1,191 @@
+import gzip
+import sqlite3
+import time
+
+import pytest
+
+from change_sync import ChangeSync
+from schema import create_tables
+
+
+def open_db(path):
+    conn = sqlite3.connect(str(path))
+    create_tables(conn)
+    conn.commit()
+    return conn
+
+
+@pytest.fixture
+def laptops(tmp_path):
+    a = open_db(tmp_path / 'a.db')
+    b = open_db(tmp_path / 'b.db')
+    yield a, b
+    a.close()
+    b.close()
+
+
+def exchange(source, target, path, peer_id=None):
+    """Exports from source (for peer_id) and imports into target. Returns (written, applied, skipped)."""
+    written = ChangeSync(source).export_delta(str(path), peer_id)
+    applied, skipped = ChangeSync(target).import_delta(str(path))
+    return written, applied, skipped
+
+
+def add_project(conn, name):
+    project_id = conn.execute("INSERT INTO projects (name) VALUES (?)", (name,)).lastrowid
+    first = conn.execute("INSERT INTO tasks (project_id, name) VALUES (?, 'Footings')", (project_id,)).lastrowid
+    conn.execute("INSERT INTO tasks (project_id, name, prerequisite_task_id) VALUES (?, 'Framing', ?)", (project_id, first))
+    conn.execute("INSERT INTO daily_log (project_id, log_date, hours_worked) VALUES (?, '2026-03-02', 8)", (project_id,))
+    conn.commit()
+    return project_id
+
+
+def task_names(conn):
+    return conn.execute("""
+        SELECT p.name, t.name, pre.name FROM tasks t
+        JOIN projects p ON p.id = t.project_id
+        LEFT JOIN tasks pre ON pre.id = t.prerequisite_task_id
+        ORDER BY p.name, t.name
+    """).fetchall()
+
+
+def test_first_sync_copies_everything_with_references(laptops, tmp_path):
+    a, b = laptops
+    add_project(a, 'Tower')
+
+    written, applied, skipped = exchange(a, b, tmp_path / 'first.ctdelta')
+
+    assert written == applied == 4
+    assert skipped == 0
+    assert task_names(b) == [('Tower', 'Footings', None), ('Tower', 'Framing', 'Footings')]
+    assert b.execute("SELECT hours_worked FROM daily_log").fetchall() == [(8.0,)]
+
+
+def test_peer_delta_only_carries_new_changes(laptops, tmp_path):
+    a, b = laptops
+    add_project(a, 'Tower')
+    exchange(a, b, tmp_path / 'a1.ctdelta')
+    # b's reply tells a how far b has seen a's changes
+    exchange(b, a, tmp_path / 'b1.ctdelta')
+
+    a.execute("UPDATE tasks SET status = 'Complete' WHERE name = 'Footings'")
+    a.commit()
+    written, applied, _ = exchange(a, b, tmp_path / 'a2.ctdelta', peer_id=ChangeSync(b).device_id)
+
+    assert written == applied == 1
+    assert b.execute("SELECT status FROM tasks WHERE name = 'Footings'").fetchone() == ('Complete',)
+
+
+def test_reimporting_a_delta_changes_nothing(laptops, tmp_path):
+    a, b = laptops
+    add_project(a, 'Tower')
+    path = tmp_path / 'a.ctdelta'
+    exchange(a, b, path)
+    before = task_names(b)
+
+    applied, skipped = ChangeSync(b).import_delta(str(path))
+
+    assert (applied, skipped) == (0, 4)
+    assert task_names(b) == before
+    assert b.execute("SELECT COUNT(*) FROM tasks").fetchone() == (2,)
+
+
+def test_concurrent_edits_resolve_to_the_latest_on_both_sides(laptops, tmp_path):
+    a, b = laptops
+    add_project(a, 'Tower')
+    exchange(a, b, tmp_path / 'a1.ctdelta')
+
+    a.execute("UPDATE tasks SET name = 'Footings (A)' WHERE name = 'Footings'")
+    a.commit()
+    time.sleep(0.01)
+    b.execute("UPDATE tasks SET name = 'Footings (B)' WHERE name = 'Footings'")
+    b.commit()
+
+    exchange(a, b, tmp_path / 'a2.ctdelta')
+    exchange(b, a, tmp_path / 'b2.ctdelta')
+
+    assert task_names(a) == task_names(b)
+    assert ('Tower', 'Footings (B)', None) in task_names(a)
+
+
+def test_project_name_clash_settles_on_the_same_names(laptops, tmp_path):
+    a, b = laptops
+    add_project(a, 'Tower')
+    add_project(b, 'Tower')
+
+    exchange(a, b, tmp_path / 'a.ctdelta')
+    exchange(b, a, tmp_path / 'b.ctdelta')
+
+    names_a = a.execute("SELECT name, uid FROM projects ORDER BY uid").fetchall()
+    names_b = b.execute("SELECT name, uid FROM projects ORDER BY uid").fetchall()
+    assert names_a == names_b
+    assert [name for name, _ in names_a] == ['Tower', f"Tower [{names_a[1][1][:6]}]"]
+    assert a.execute("SELECT COUNT(*) FROM tasks").fetchone() == (4,)
+
+
+def test_parent_updated_after_children_still_brings_the_children(laptops, tmp_path):
+    a, b = laptops
+    add_project(a, 'Tower')
+    time.sleep(0.01)
+    # Like the dashboard marking a project Completed once its tasks are done
+    a.execute("UPDATE projects SET status = 'Completed' WHERE name = 'Tower'")
+    a.commit()
+
+    written, applied, skipped = exchange(a, b, tmp_path / 'a.ctdelta')
+
+    assert written == applied == 4
+    assert skipped == 0
+    assert task_names(b) == [('Tower', 'Footings', None), ('Tower', 'Framing', 'Footings')]
+    assert b.execute("SELECT status FROM projects").fetchall() == [('Completed',)]
+    assert b.execute("SELECT COUNT(*) FROM daily_log").fetchone() == (1,)
+
+
+def test_children_listed_before_their_project_are_applied(laptops, tmp_path):
+    a, b = laptops
+    add_project(a, 'Tower')
+    path = tmp_path / 'a.ctdelta'
+    ChangeSync(a).export_delta(str(path))
+
+    # A delta written in change order rather than table order
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        header, *changes = f.readlines()
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        f.writelines([header] + changes[::-1])
+
+    assert ChangeSync(b).import_delta(str(path)) == (4, 0)
+    assert task_names(b) == [('Tower', 'Footings', None), ('Tower', 'Framing', 'Footings')]
+
+
+def test_orphans_of_a_deleted_project_are_dropped_unrecorded(laptops, tmp_path):
+    a, b = laptops
+    add_project(a, 'Tower')
+    exchange(a, b, tmp_path / 'a1.ctdelta')
+    exchange(b, a, tmp_path / 'b1.ctdelta')
+
+    b.execute("DELETE FROM daily_log")
+    b.execute("DELETE FROM tasks")
+    b.execute("DELETE FROM projects")
+    b.commit()
+    a.execute("INSERT INTO tasks (project_id, name) VALUES (1, 'Roofing')")
+    a.commit()
+    roofing = a.execute("SELECT uid FROM tasks WHERE name = 'Roofing'").fetchone()[0]
+
+    _, applied, skipped = exchange(a, b, tmp_path / 'a2.ctdelta', peer_id=ChangeSync(b).device_id)
+
+    assert (applied, skipped) == (0, 1)
+    assert b.execute("SELECT COUNT(*) FROM tasks").fetchone() == (0,)
+    assert b.execute("SELECT COUNT(*) FROM change_log WHERE row_uid = ?", (roofing,)).fetchone() == (0,)
+
+
+def test_change_log_entries_carry_the_local_project(laptops, tmp_path):
+    a, b = laptops
+    add_project(a, 'Tower')
+    add_project(b, 'Depot')
+
+    exchange(a, b, tmp_path / 'a.ctdelta')
+
+    tower = b.execute("SELECT id FROM projects WHERE name = 'Tower'").fetchone()[0]
+    assert a.execute("SELECT DISTINCT project_id FROM change_log").fetchall() == [(1,)]
+    assert b.execute(
+        "SELECT table_name, COUNT(*) FROM change_log WHERE project_id = ? GROUP BY table_name ORDER BY 1", (tower,)
+    ).fetchall() == [('daily_log', 1), ('projects', 1), ('tasks', 2)]
@@ -0,0 +1,91 @@
+import pytest
+
+from labour import WEEK_OF, labour_breakdown
+
+# What labour_rollup should hold, recomputed from scratch
+RECOMPUTED_ROLLUP = f"""
+    SELECT l.project_id, a.task_id, a.crew_id, {WEEK_OF.format('l.log_date')}, c.trade_id, SUM(a.hours)
+    FROM log_allocations a
+    JOIN daily_log l ON l.id = a.log_id
+    LEFT JOIN crews c ON c.id = a.crew_id
+    GROUP BY 1, 2, 3, 4
+    ORDER BY 1, 2, 3, 4
+"""
+
+
+def rollup(conn):
+    return conn.execute(
+        "SELECT project_id, task_id, crew_id, week, trade_id, hours FROM labour_rollup ORDER BY 1, 2, 3, 4"
+    ).fetchall()
+
+
+def assert_rollup_current(conn):
+    assert rollup(conn) == conn.execute(RECOMPUTED_ROLLUP).fetchall()
+
+
+@pytest.fixture
+def site(conn):
+    conn.execute("INSERT INTO projects (name) VALUES ('Tower')")
+    conn.execute("INSERT INTO projects (name) VALUES ('Depot')")
+    conn.executemany("INSERT INTO tasks (project_id, name) VALUES (?, ?)", [
+        (1, 'Footings'), (1, 'Framing'), (2, 'Fit-out'),
+    ])
+    conn.executemany("INSERT INTO trades (name) VALUES (?)", [('Concrete',), ('Carpentry',)])
+    conn.executemany("INSERT INTO crews (name, trade_id) VALUES (?, ?)", [('Crew A', 1), ('Crew B', 2)])
+    # Monday 2 March and Wednesday 4 March share a week; Tuesday 10 March starts the next one
+    conn.executemany("INSERT INTO daily_log (project_id, log_date, hours_worked) VALUES (?, ?, ?)", [
+        (1, '2026-03-02', 10), (1, '2026-03-04', 8), (1, '2026-03-10', 6), (2, '2026-03-04', 4),
+    ])
+    conn.executemany("INSERT INTO log_allocations (log_id, task_id, crew_id, hours) VALUES (?, ?, ?, ?)", [
+        (1, 1, 1, 6), (1, 2, 2, 4), (2, 1, 1, 5), (3, 2, 2, 6), (4, 3, 2, 4),
+    ])
+    return conn
+
+
+def test_inserts_roll_up_per_task_crew_and_week(site):
+    assert_rollup_current(site)
+    assert labour_breakdown(site, 1, 'Task') == [('Footings', 11.0), ('Framing', 10.0)]
+    assert labour_breakdown(site, 1, 'Week') == [('Week of 2026-03-09', 6.0), ('Week of 2026-03-02', 15.0)]
+    assert labour_breakdown(site, 1, 'Trade') == [('Concrete', 11.0), ('Carpentry', 10.0)]
+    assert labour_breakdown(site, 2, 'Crew') == [('Crew B', 4.0)]
+
+
+def test_moving_a_log_entry_moves_its_hours(site):
+    site.execute("UPDATE daily_log SET log_date = '2026-03-11' WHERE id = 1")
+    assert_rollup_current(site)
+    assert labour_breakdown(site, 1, 'Week') == [('Week of 2026-03-09', 16.0), ('Week of 2026-03-02', 5.0)]
+
+    site.execute("UPDATE daily_log SET project_id = 2 WHERE id = 2")
+    assert_rollup_current(site)
+    assert labour_breakdown(site, 2, 'Task') == [('Footings', 5.0), ('Fit-out', 4.0)]
+
+
+def test_changing_a_crews_trade_moves_its_hours(site):
+    site.execute("UPDATE crews SET trade_id = 1 WHERE id = 2")
+    assert_rollup_current(site)
+    assert labour_breakdown(site, 1, 'Trade') == [('Concrete', 21.0)]
+
+    site.execute("UPDATE crews SET trade_id = NULL WHERE id = 1")
+    assert labour_breakdown(site, 1, 'Trade') == [('No Trade', 11.0), ('Concrete', 10.0)]
+
+
+def test_editing_and_removing_allocations(site):
+    site.execute("UPDATE log_allocations SET hours = 2, crew_id = 2 WHERE id = 1")
+    assert_rollup_current(site)
+    assert labour_breakdown(site, 1, 'Crew') == [('Crew B', 12.0), ('Crew A', 5.0)]
+    site.execute("DELETE FROM log_allocations WHERE id = 3")
+    assert_rollup_current(site)
+    assert labour_breakdown(site, 1, 'Crew') == [('Crew B', 12.0)]
+
+
+def test_deleting_a_task_or_log_entry_drops_its_allocations(site):
+    site.execute("DELETE FROM tasks WHERE id = 2")
+    assert_rollup_current(site)
+    assert site.execute("SELECT COUNT(*) FROM log_allocations WHERE task_id = 2").fetchone() == (0,)
+    assert labour_breakdown(site, 1, 'Task') == [('Footings', 11.0)]
+
+    site.execute("DELETE FROM daily_log WHERE id = 1")
+    assert_rollup_current(site)
+    assert labour_breakdown(site, 1, 'Task') == [('Footings', 5.0)]
+    # Rows that net out to zero are removed rather than left behind
+    assert site.execute("SELECT COUNT(*) FROM labour_rollup WHERE abs(hours) < 1e-9").fetchone() == (0,)
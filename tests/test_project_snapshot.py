@@ -0,0 +1,135 @@
+import json
+
+import pytest
+
+from project_snapshot import ProjectSnapshot, TaskColumns, day_number, iso_date
+from task_status import SET_STATUS_QUERY
+
+
+class SnapshotDb:
+    """The read side of DatabaseManager (fetch_data, iter_data) over a plain connection."""
+    def __init__(self, conn):
+        self.conn = conn
+
+    def fetch_data(self, query, params=()):
+        return self.conn.execute(query, params).fetchall()
+
+    def iter_data(self, query, params=(), chunk_size=2):
+        cursor = self.conn.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield rows
+
+
+@pytest.fixture
+def db(conn):
+    conn.execute("INSERT INTO projects (name) VALUES ('Tower')")
+    conn.execute("INSERT INTO projects (name) VALUES ('Depot')")
+    conn.execute("INSERT INTO tasks (project_id, name, planned_start, planned_end) VALUES (1, 'Footings', '2026-03-02', '2026-03-06')")
+    conn.execute("INSERT INTO tasks (project_id, name, prerequisite_task_id, status) VALUES (1, 'Framing', 1, 'In Progress')")
+    conn.execute("INSERT INTO tasks (project_id, name) VALUES (2, 'Elsewhere')")
+    conn.execute("INSERT INTO materials (project_id, name, quantity, unit_cost, alert_threshold) VALUES (1, 'Cement', 4, 2.5, 5)")
+    conn.execute("INSERT INTO materials (project_id, name, quantity, unit_cost, alert_threshold) VALUES (1, 'Rebar', 10, 1.0, 2)")
+    for log_date, hours in (('2026-01-10', 8), ('2026-02-20', 6), ('2026-03-01', 4)):
+        conn.execute("INSERT INTO daily_log (project_id, log_date, hours_worked) VALUES (1, ?, ?)", (log_date, hours))
+    conn.execute("INSERT INTO daily_log (project_id, log_date, hours_worked) VALUES (2, '2026-03-01', 100)")
+    conn.commit()
+    return SnapshotDb(conn)
+
+
+def test_column_store_updates_in_place_and_reindexes():
+    tasks = TaskColumns()
+    tasks.append(7, 'Footings', 0, 0, 0, 0, 0, 0)
+    tasks.append(9, 'Framing', 1, 7, 0, 0, 0, 0)
+    tasks.append(12, 'Roofing', 0, 9, 0, 0, 0, 0)
+
+    # A row that is already present is updated rather than duplicated
+    tasks.append(9, 'Framing (revised)', 2, 7, 0, 0, 0, 0)
+    assert len(tasks) == 3
+    assert tasks.names[tasks.index[9]] == 'Framing (revised)'
+    assert tasks.statuses.typecode == 'b' and list(tasks.statuses) == [0, 2, 0]
+
+    tasks.remove([7, 404])
+    assert list(tasks.ids) == [9, 12]
+    assert tasks.index == {9: 0, 12: 1}
+    assert tasks.ids.typecode == 'q'
+
+    tasks.clear()
+    assert len(tasks) == 0 and list(tasks.names) == []
+
+
+def test_load_reads_only_the_project(db):
+    snapshot = ProjectSnapshot.load(db, 1)
+
+    assert list(snapshot.tasks.names) == ['Footings', 'Framing']
+    assert snapshot.task_name(snapshot.tasks.prereq_ids[1]) == 'Footings'
+    assert snapshot.tasks.prereq_ids[0] == 0
+    assert snapshot.task_status(1) == 'In Progress'
+    assert iso_date(snapshot.tasks.planned_start[0]) == '2026-03-02'
+    assert snapshot.planned_duration(0) == 5
+    assert snapshot.planned_duration(1) is None
+    assert snapshot.material_cost() == pytest.approx(20.0)
+    assert snapshot.low_stock_materials() == ['Cement']
+    assert snapshot.total_hours() == 18
+
+
+def test_status_changes_in_place_match_a_reload(db):
+    snapshot = ProjectSnapshot.load(db, 1)
+    today = db.fetch_data("SELECT date('now', 'localtime')")[0][0]
+
+    for status, task_ids in (('In Progress', [1]), ('Complete', [1, 2])):
+        db.conn.execute(SET_STATUS_QUERY, {'status': status, 'ids': json.dumps(task_ids)})
+        snapshot.set_task_status(task_ids, status, today)
+
+    reloaded = ProjectSnapshot.load(db, 1)
+    for column in ('ids', 'statuses', 'prereq_ids', 'planned_start', 'planned_end', 'actual_start', 'actual_end'):
+        assert list(getattr(snapshot.tasks, column)) == list(getattr(reloaded.tasks, column)), column
+    assert snapshot.completed_task_count() == 2
+    assert snapshot.tasks.actual_end[0] == day_number(today)
+
+
+def test_material_and_task_edits_in_place(db):
+    snapshot = ProjectSnapshot.load(db, 1)
+
+    snapshot.add_task(50, 'Roofing', 2, planned_start='2026-04-01', planned_end='2026-04-03')
+    snapshot.set_planned_dates([1, 50], '2026-05-01', None)
+    snapshot.remove_tasks([2])
+    snapshot.add_material(60, 'Timber', 3, 10.0, 1)
+    snapshot.set_material_quantity(1, 8)
+    snapshot.remove_materials([2])
+
+    assert list(snapshot.tasks.ids) == [1, 50]
+    assert [iso_date(day) for day in snapshot.tasks.planned_start] == ['2026-05-01', '2026-05-01']
+    assert list(snapshot.tasks.planned_end) == [0, 0]
+    assert snapshot.material_cost() == pytest.approx(8 * 2.5 + 30.0)
+    assert snapshot.low_stock_materials() == []
+
+
+def test_log_range_loads_only_matching_entries(db):
+    snapshot = ProjectSnapshot.load(db, 1, ('2026-02-01', '2026-02-28'))
+    assert list(snapshot.logs.dates) == ['2026-02-20']
+
+    snapshot.load_logs(db, '2026-02-01', None)
+    assert list(snapshot.logs.dates) == ['2026-03-01', '2026-02-20']
+    snapshot.load_logs(db)
+    assert list(snapshot.logs.dates) == ['2026-03-01', '2026-02-20', '2026-01-10']
+
+
+def test_hour_total_is_project_wide_and_kept_current(db):
+    snapshot = ProjectSnapshot.load(db, 1, ('2026-03-01', None))
+    assert snapshot.total_hours() == 18
+
+    # Changing the range does not re-read (or change) the total
+    db.conn.execute("UPDATE daily_log SET hours_worked = 50 WHERE id = 1")
+    snapshot.load_logs(db, None, '2026-01-31')
+    assert snapshot.total_hours() == 18
+
+    snapshot.load_logged_hours(db)
+    assert snapshot.total_hours() == 60
+
+    snapshot.add_log(70, '2026-03-05', 2.5, 'Outside the range')
+    snapshot.remove_logs([1])
+    assert 70 not in snapshot.logs.index
+    assert snapshot.total_hours() == pytest.approx(12.5)
@@ -0,0 +1,84 @@
+from project_templates import create_project_from_template, list_templates, save_project_as_template
+
+
+def add_project(conn, name, start_date=None):
+    project_id = conn.execute("INSERT INTO projects (name, start_date) VALUES (?, ?)", (name, start_date)).lastrowid
+    footings = conn.execute("""
+        INSERT INTO tasks (project_id, name, planned_start, planned_end) VALUES (?, 'Footings', '2026-03-04', '2026-03-06')
+    """, (project_id,)).lastrowid
+    framing = conn.execute("""
+        INSERT INTO tasks (project_id, name, prerequisite_task_id, planned_start) VALUES (?, 'Framing', ?, '2026-03-09')
+    """, (project_id, footings)).lastrowid
+    conn.execute("INSERT INTO tasks (project_id, name, prerequisite_task_id) VALUES (?, 'Roofing', ?)", (project_id, framing))
+    conn.execute("INSERT INTO materials (project_id, name, quantity, unit_cost) VALUES (?, 'Cement', 40, 6.5)", (project_id,))
+    return project_id
+
+
+def task_graph(conn, project_id):
+    """(name, prerequisite name, planned_start, planned_end) for a project, with prerequisites checked to stay inside it."""
+    return conn.execute("""
+        SELECT t.name, pre.name, t.planned_start, t.planned_end FROM tasks t
+        LEFT JOIN tasks pre ON pre.id = t.prerequisite_task_id AND pre.project_id = t.project_id
+        WHERE t.project_id = ? ORDER BY t.id
+    """, (project_id,)).fetchall()
+
+
+def test_clone_remaps_the_task_graph_onto_new_ids(conn):
+    source = add_project(conn, 'Tower', '2026-03-02')
+    template_id = save_project_as_template(conn, source, 'Small build')
+
+    first = create_project_from_template(conn, template_id, 'Depot', '2026-06-01', None)
+    second = create_project_from_template(conn, template_id, 'Annex', '2026-06-01', None)
+
+    assert list_templates(conn) == [(template_id, 'Small build', 3)]
+    for project_id in (first, second):
+        assert [(name, prereq) for name, prereq, _, _ in task_graph(conn, project_id)] == [
+            ('Footings', None), ('Framing', 'Footings'), ('Roofing', 'Framing')
+        ]
+        assert conn.execute("SELECT name, quantity, unit_cost FROM materials WHERE project_id = ?", (project_id,)).fetchall() == [
+            ('Cement', 40.0, 6.5)
+        ]
+    # Every clone gets its own rows and the source project is untouched
+    assert conn.execute("SELECT COUNT(DISTINCT id) FROM tasks").fetchone() == (9,)
+    assert [row[:2] for row in task_graph(conn, source)] == [
+        ('Footings', None), ('Framing', 'Footings'), ('Roofing', 'Framing')
+    ]
+
+
+def test_clone_lands_past_existing_ids(conn):
+    source = add_project(conn, 'Tower')
+    template_id = save_project_as_template(conn, source, 'Small build')
+    # Later tasks push the highest id well past the template's ids
+    conn.execute("INSERT INTO tasks (id, project_id, name) VALUES (500, ?, 'Snagging')", (source,))
+
+    clone = create_project_from_template(conn, template_id, 'Depot', None, None)
+
+    ids = [row[0] for row in conn.execute("SELECT id FROM tasks WHERE project_id = ? ORDER BY id", (clone,))]
+    assert ids == [501, 502, 503]
+    assert [row[:2] for row in task_graph(conn, clone)][1:] == [('Framing', 'Footings'), ('Roofing', 'Framing')]
+
+
+def test_prerequisites_outside_the_project_are_dropped(conn):
+    other = add_project(conn, 'Depot')
+    outside = conn.execute("SELECT id FROM tasks WHERE project_id = ? AND name = 'Footings'", (other,)).fetchone()[0]
+    source = conn.execute("INSERT INTO projects (name) VALUES ('Tower')").lastrowid
+    conn.execute("INSERT INTO tasks (project_id, name, prerequisite_task_id) VALUES (?, 'Fit-out', ?)", (source, outside))
+
+    template_id = save_project_as_template(conn, source, 'Fit-out only')
+
+    assert conn.execute("SELECT name, prerequisite_task_id FROM template_tasks WHERE template_id = ?", (template_id,)).fetchall() == [
+        ('Fit-out', None)
+    ]
+
+
+def test_planned_dates_follow_the_new_start_date(conn):
+    source = add_project(conn, 'Tower', '2026-03-02')
+    template_id = save_project_as_template(conn, source, 'Small build')
+
+    dated = create_project_from_template(conn, template_id, 'Depot', '2026-06-01', None)
+    undated = create_project_from_template(conn, template_id, 'Annex', None, None)
+
+    assert [row[2:] for row in task_graph(conn, dated)] == [
+        ('2026-06-03', '2026-06-05'), ('2026-06-08', None), (None, None)
+    ]
+    assert [row[2:] for row in task_graph(conn, undated)] == [(None, None)] * 3
@@ -0,0 +1,85 @@
+import sqlite3
+
+import pytest
+
+from schema import SCHEMA_VERSION, create_tables, schema_version
+
+# Tables as the first release created them: free-text dates, no planned/actual task dates
+LEGACY_SCHEMA = """
+CREATE TABLE projects (
+    id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE,
+    start_date TEXT, end_date TEXT, status TEXT DEFAULT 'Active'
+);
+CREATE TABLE tasks (
+    id INTEGER PRIMARY KEY, project_id INTEGER NOT NULL, name TEXT NOT NULL,
+    status TEXT DEFAULT 'Not Started', prerequisite_task_id INTEGER
+);
+CREATE TABLE materials (
+    id INTEGER PRIMARY KEY, project_id INTEGER NOT NULL, name TEXT NOT NULL,
+    quantity REAL DEFAULT 0, unit_cost REAL DEFAULT 0.0, alert_threshold REAL DEFAULT 0
+);
+CREATE TABLE daily_log (
+    id INTEGER PRIMARY KEY, project_id INTEGER NOT NULL, log_date TEXT NOT NULL,
+    description TEXT, hours_worked REAL
+);
+CREATE INDEX idx_daily_log_project ON daily_log(project_id);
+"""
+
+
+@pytest.fixture
+def legacy(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / 'legacy.db'))
+    conn.executescript(LEGACY_SCHEMA)
+    conn.executemany("INSERT INTO projects (name, start_date, end_date) VALUES (?, ?, ?)", [
+        ('Tower', '2026/3/2', '15.06.2026'),
+        ('Depot', 'YYYY-MM-DD', 'next spring'),
+        ('Annex', ' 2026-01-05 ', None),
+    ])
+    conn.executemany("INSERT INTO daily_log (project_id, log_date, hours_worked) VALUES (1, ?, 8)", [
+        ('2026-3-9',), ('09/03/2026',), ('2026-03-10',), ('after the storm',),
+    ])
+    conn.execute("INSERT INTO tasks (project_id, name) VALUES (1, 'Footings')")
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def test_legacy_dates_become_iso_text(legacy):
+    create_tables(legacy)
+    legacy.commit()
+
+    assert legacy.execute("SELECT name, start_date, end_date FROM projects ORDER BY id").fetchall() == [
+        ('Tower', '2026-03-02', '2026-06-15'),
+        # The old placeholder and unreadable project dates are cleared
+        ('Depot', None, None),
+        ('Annex', '2026-01-05', None),
+    ]
+    # Unreadable log dates are kept rather than losing the entry
+    assert [row[0] for row in legacy.execute("SELECT log_date FROM daily_log ORDER BY id")] == [
+        '2026-03-09', '2026-03-09', '2026-03-10', 'after the storm'
+    ]
+
+
+def test_migration_upgrades_the_schema_once(legacy):
+    create_tables(legacy)
+    legacy.commit()
+
+    assert schema_version(legacy) == SCHEMA_VERSION
+    indexes = {row[1] for row in legacy.execute("PRAGMA index_list(daily_log)")}
+    assert 'idx_daily_log_project' not in indexes
+    assert 'idx_daily_log_project_date' in indexes
+    columns = {row[1] for row in legacy.execute("PRAGMA table_info(tasks)")}
+    assert {'planned_start', 'planned_end', 'actual_start', 'actual_end'} <= columns
+
+    # Running it again on an up-to-date database changes nothing
+    before = legacy.execute("SELECT * FROM daily_log ORDER BY id").fetchall()
+    create_tables(legacy)
+    assert legacy.execute("SELECT * FROM daily_log ORDER BY id").fetchall() == before
+
+
+def test_range_queries_use_the_date_index(conn):
+    plan = conn.execute("""
+        EXPLAIN QUERY PLAN
+        SELECT id FROM daily_log WHERE project_id = ? AND log_date >= ? AND log_date <= ?
+    """, (1, '2026-03-01', '2026-03-14')).fetchall()
+    assert any('idx_daily_log_project_date' in row[-1] for row in plan)
@@ -0,0 +1,134 @@
+import asyncio
+import json
+import sqlite3
+
+import pytest
+
+from schema import create_tables
+from site_api import SiteApiServer
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / 'site.db')
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    create_tables(conn)
+    conn.execute("INSERT INTO projects (name) VALUES ('Tower')")
+    conn.execute("INSERT INTO tasks (project_id, name) VALUES (1, 'Footings')")
+    conn.execute("INSERT INTO tasks (project_id, name, prerequisite_task_id) VALUES (1, 'Framing', 1)")
+    conn.execute("INSERT INTO materials (project_id, name, quantity, unit_cost) VALUES (1, 'Cement', 10, 5.0)")
+    conn.commit()
+    conn.close()
+    return path
+
+
+async def request(port, method, path, body=None, raw_body=None):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    data = raw_body if raw_body is not None else (json.dumps(body).encode() if body is not None else b'')
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode()
+        + data
+    )
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, payload = response.partition(b'\r\n\r\n')
+    return int(head.split()[1]), json.loads(payload)
+
+
+def run_with_server(db_path, scenario):
+    async def main():
+        api = SiteApiServer(db_path, port=0)
+        port = await api.start()
+        try:
+            return await scenario(port)
+        finally:
+            await api.close()
+    return asyncio.run(main())
+
+
+def test_read_endpoints(db_path):
+    async def scenario(port):
+        return (
+            await request(port, 'GET', '/projects'),
+            await request(port, 'GET', '/projects/1/tasks'),
+            await request(port, 'GET', '/projects/1/materials'),
+            await request(port, 'GET', '/projects/1/report'),
+            await request(port, 'GET', '/report'),
+        )
+
+    projects, tasks, materials, report, portfolio = run_with_server(db_path, scenario)
+    assert projects == (200, [{'id': 1, 'name': 'Tower', 'start_date': None, 'end_date': None, 'status': 'Active'}])
+    assert tasks[0] == 200 and [task['name'] for task in tasks[1]] == ['Footings', 'Framing']
+    assert materials[0] == 200 and materials[1][0]['quantity'] == 10
+    assert report[0] == 200 and report[1]['total_tasks'] == 2 and report[1]['material_cost'] == 50.0
+    assert portfolio == (200, [report[1]])
+
+
+def test_completing_a_task_before_its_prerequisite_conflicts(db_path):
+    async def scenario(port):
+        return (
+            await request(port, 'POST', '/tasks/status', {'task_ids': [2], 'status': 'Complete'}),
+            await request(port, 'POST', '/tasks/status', {'task_ids': [1, 2], 'status': 'Complete'}),
+        )
+
+    conflict, completed = run_with_server(db_path, scenario)
+    assert conflict[0] == 409
+    assert completed == (200, {'updated': 2, 'status': 'Complete'})
+
+
+def test_error_statuses(db_path):
+    async def scenario(port):
+        return [
+            await request(port, 'GET', '/projects/9/tasks'),
+            await request(port, 'GET', '/nowhere'),
+            await request(port, 'DELETE', '/projects'),
+            await request(port, 'POST', '/projects/1/logs', {'log_date': 'soon', 'hours_worked': 2}),
+            await request(port, 'POST', '/projects/1/logs', raw_body=b'{not json'),
+            await request(port, 'POST', '/tasks/status', {'task_ids': [1], 'status': 'Done'}),
+        ]
+
+    statuses = [status for status, _ in run_with_server(db_path, scenario)]
+    assert statuses == [404, 404, 405, 400, 400, 400]
+
+
+def test_non_finite_hours_are_rejected(db_path):
+    async def scenario(port):
+        return [
+            await request(port, 'POST', '/projects/1/logs', raw_body=b'{"log_date": "2026-03-02", "hours_worked": NaN}'),
+            await request(port, 'POST', '/projects/1/logs', raw_body=b'{"log_date": "2026-03-02", "hours_worked": -Infinity}'),
+            await request(port, 'POST', '/projects/1/logs', {'log_date': '2026-03-02', 'hours_worked': 'inf'}),
+        ]
+
+    responses = run_with_server(db_path, scenario)
+    assert [status for status, _ in responses] == [400, 400, 400]
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT COUNT(*) FROM daily_log").fetchone() == (0,)
+    conn.close()
+
+
+def test_concurrent_log_posts_are_all_committed(db_path):
+    async def scenario(port):
+        posts = [
+            request(port, 'POST', '/projects/1/logs', {'log_date': '2026-03-02', 'hours_worked': 1.5, 'description': str(i)})
+            for i in range(200)
+        ]
+        results = await asyncio.gather(*posts, *(request(port, 'GET', '/projects/1/report') for _ in range(50)))
+        logs = await request(port, 'GET', '/projects/1/logs?from=2026-03-02&to=2026-03-02')
+        return results, logs
+
+    results, logs = run_with_server(db_path, scenario)
+    assert {status for status, _ in results[:200]} == {201}
+    assert {status for status, _ in results[200:]} == {200}
+    assert logs[0] == 200 and len(logs[1]) == 200
+    assert len({entry['id'] for entry in logs[1]}) == 200
+
+
+def test_outdated_schema_is_refused(tmp_path):
+    path = str(tmp_path / 'old.db')
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA user_version = 1")
+    conn.close()
+    with pytest.raises(SystemExit):
+        SiteApiServer(path, port=0)
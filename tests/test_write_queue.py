@@ -0,0 +1,117 @@
+import sqlite3
+import threading
+
+import pytest
+
+from write_queue import WriteQueue
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / 'queue.db')
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT NOT NULL)")
+    conn.commit()
+    conn.close()
+    return path
+
+
+def names(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return [row[0] for row in conn.execute("SELECT name FROM items ORDER BY id")]
+    finally:
+        conn.close()
+
+
+def insert(name):
+    return [("INSERT INTO items (name) VALUES (?)", (name,))]
+
+
+def test_writes_close_together_share_one_commit(db_path):
+    writer = WriteQueue(db_path, window=0.2, sequence_query="SELECT COUNT(*) FROM items")
+    futures = [writer.submit(insert(f"item {i}")) for i in range(5)]
+
+    assert [f.result(timeout=5) for f in futures] == [1, 2, 3, 4, 5]
+    # One group, so one range of counter values
+    assert list(writer.own_sequences) == [(1, 5)]
+    assert writer.wrote(3) and not writer.wrote(6)
+    writer.close()
+
+
+def test_failing_unit_only_rolls_back_itself(db_path):
+    writer = WriteQueue(db_path, window=0.2)
+
+    def insert_then_fail(conn):
+        conn.execute("INSERT INTO items (name) VALUES ('broken')")
+        raise ValueError("bad input")
+
+    first = writer.submit(insert('first'))
+    broken = writer.submit_call(insert_then_fail)
+    invalid = writer.submit([("INSERT INTO items (name) VALUES (NULL)", ())])
+    last = writer.submit(insert('last'))
+
+    assert first.result(timeout=5) == 1
+    with pytest.raises(ValueError):
+        broken.result(timeout=5)
+    with pytest.raises(sqlite3.IntegrityError):
+        invalid.result(timeout=5)
+    last.result(timeout=5)
+    writer.close()
+
+    assert names(db_path) == ['first', 'last']
+
+
+def test_futures_resolve_only_after_commit(db_path):
+    writer = WriteQueue(db_path)
+    seen = []
+    done = threading.Event()
+
+    def committed(future):
+        # Another connection already sees the row when the caller hears back
+        seen.extend(names(db_path))
+        done.set()
+
+    writer.submit(insert('visible')).add_done_callback(committed)
+
+    assert done.wait(5)
+    assert seen == ['visible']
+    writer.close()
+
+
+def test_close_commits_earlier_writes_and_fails_later_ones(db_path):
+    writer = WriteQueue(db_path)
+    earlier = writer.submit(insert('kept'))
+    writer.close()
+    later = writer.submit(insert('too late'))
+
+    assert earlier.result(timeout=5) == 1
+    with pytest.raises(sqlite3.OperationalError):
+        later.result(timeout=5)
+    assert names(db_path) == ['kept']
+
+
+# The crash is meant to escape the writer thread
+@pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+def test_pending_writes_fail_when_the_writer_thread_dies(db_path, monkeypatch):
+    started = threading.Event()
+    release = threading.Event()
+
+    def crash(conn, batch):
+        started.set()
+        release.wait(5)
+        raise RuntimeError("writer crashed")
+
+    writer = WriteQueue(db_path, window=0)
+    monkeypatch.setattr(writer, 'commit_batch', crash)
+
+    in_flight = writer.submit(insert('a'))
+    assert started.wait(5)
+    queued = writer.submit(insert('b'))
+    release.set()
+    writer.thread.join(5)
+
+    for future in (in_flight, queued, writer.submit(insert('c'))):
+        with pytest.raises(sqlite3.OperationalError):
+            future.result(timeout=5)
+    assert names(db_path) == []
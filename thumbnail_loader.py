@@ -0,0 +1,90 @@
+import os
+import threading
+
+from PyQt5.QtCore import Qt, QObject, QRunnable, QThread, QThreadPool, pyqtSignal
+from PyQt5.QtGui import QImage, QImageReader
+
+from attachments import ThumbnailCache
+
+THUMBNAIL_SIZE = 160
+
+
+class ThumbnailSignals(QObject):
+    finished = pyqtSignal(str, QImage)
+
+
+class ThumbnailTask(QRunnable):
+    """Produces one thumbnail on a pool thread: from the disk cache if possible, otherwise by decoding the photo."""
+    def __init__(self, sha256, source_path, cache, size, signals):
+        super().__init__()
+        self.sha256 = sha256
+        self.source_path = source_path
+        self.cache = cache
+        self.size = size
+        self.signals = signals
+
+    def run(self):
+        cached = self.cache.lookup(self.sha256)
+        image = QImage(cached) if cached else QImage()
+        if image.isNull():
+            image = self.decode()
+        self.signals.finished.emit(self.sha256, image)
+
+    def decode(self):
+        reader = QImageReader(self.source_path)
+        # Phone photos are often stored sideways with an EXIF orientation tag
+        reader.setAutoTransform(True)
+        original = reader.size()
+        if original.isValid():
+            # Lets JPEG decoding downscale as it goes instead of inflating the full image first
+            reader.setScaledSize(original.scaled(self.size, self.size, Qt.KeepAspectRatio))
+        image = reader.read()
+        if image.isNull():
+            return image
+
+        target = self.cache.path(self.sha256)
+        temp_path = f"{target}.{threading.get_ident()}.part"
+        if image.save(temp_path, 'JPG', 85):
+            os.replace(temp_path, target)
+            self.cache.store(self.sha256)
+        return image
+
+
+class ThumbnailLoader(QObject):
+    """
+    Decodes attachment thumbnails on a background thread pool and hands them back
+    to the GUI thread through thumbnail_ready(sha256, image). A null image means the
+    file could not be read as a picture.
+    """
+    thumbnail_ready = pyqtSignal(str, QImage)
+
+    def __init__(self, store, size=THUMBNAIL_SIZE, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.size = size
+        self.cache = ThumbnailCache(os.path.join(store.root, 'thumbnails'))
+        self.pending = set()
+
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max(1, QThread.idealThreadCount() - 1))
+        self.signals = ThumbnailSignals()
+        self.signals.finished.connect(self.task_finished)
+
+    def request(self, sha256):
+        if sha256 in self.pending:
+            return
+        self.pending.add(sha256)
+        self.pool.start(ThumbnailTask(sha256, self.store.object_path(sha256), self.cache, self.size, self.signals))
+
+    def cancel_pending(self):
+        """Drops queued requests that have not started yet (e.g. when another log entry is selected)."""
+        self.pool.clear()
+        self.pending.clear()
+
+    def task_finished(self, sha256, image):
+        self.pending.discard(sha256)
+        self.thumbnail_ready.emit(sha256, image)
+
+    def stop(self):
+        self.cancel_pending()
+        self.pool.waitForDone()
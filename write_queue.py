@@ -0,0 +1,185 @@
+import queue
+import sqlite3
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+
+class WriteQueue:
+    """
+    Write-behind queue with a single writer thread (group commit).
+    Writes that arrive within `window` seconds of each other are committed together
+    in one transaction, so a burst of data entry pays for one fsync instead of one per write.
+    Each submitted unit runs inside its own savepoint: a failing unit is rolled back
+    on its own without affecting the rest of the group.
+    Units are applied and completed strictly in submission order, which also keeps
+    every project's writes in the order they were made.
+    If `sequence_query` is given (an SQL query returning an increasing counter, such as the
+    latest change_log seq), the counter values each group produced are remembered so
+    readers can tell this queue's own writes from other connections' (see wrote()).
+    """
+    def __init__(self, db_name, window=0.005, max_batch=500, sequence_query=None):
+        self.db_name = db_name
+        self.window = window
+        self.max_batch = max_batch
+        self.sequence_query = sequence_query
+        # (first, last) counter ranges written by recent groups; older ones fall off the end
+        self.own_sequences = deque(maxlen=1000)
+        self.sequence_lock = threading.Lock()
+        self.queue = queue.Queue()
+        # Set once the writer thread has exited; later submissions fail straight away
+        self.stopped = False
+        self.state_lock = threading.Lock()
+        self.thread = threading.Thread(target=self.run, name="db-writer", daemon=True)
+        self.thread.start()
+
+    def submit(self, statements):
+        """
+        Queues a unit of work: a list of (query, params) pairs applied atomically.
+        Returns a Future resolving to the lastrowid of the unit's final statement.
+        """
+        return self.enqueue(list(statements))
+
+    def submit_call(self, func):
+        """
+        Queues func(conn) to run on the writer connection as one atomic unit.
+        func must not commit; it runs inside the group transaction.
+        Returns a Future resolving to func's return value.
+        """
+        return self.enqueue(func)
+
+    def enqueue(self, work):
+        future = Future()
+        with self.state_lock:
+            if self.stopped:
+                future.set_exception(sqlite3.OperationalError("The database writer has stopped."))
+            else:
+                self.queue.put((work, future))
+        return future
+
+    def wrote(self, seq):
+        """True if counter value seq was produced by one of this queue's recent commits."""
+        with self.sequence_lock:
+            return any(first <= seq <= last for first, last in self.own_sequences)
+
+    def read_sequence(self, conn):
+        return conn.execute(self.sequence_query).fetchone()[0]
+
+    def flush(self):
+        """Blocks until everything submitted so far has been committed."""
+        self.submit([]).result()
+
+    def close(self):
+        """
+        Commits the writes submitted so far and stops the writer thread.
+        Anything submitted after close() fails with sqlite3.OperationalError.
+        """
+        with self.state_lock:
+            if not self.stopped:
+                self.queue.put(None)
+        self.thread.join()
+
+    def run(self):
+        batch = []
+        try:
+            self.write_batches(batch)
+        finally:
+            self.fail_pending(batch)
+
+    def write_batches(self, batch):
+        conn = sqlite3.connect(self.db_name, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        stopping = False
+
+        while not stopping:
+            item = self.queue.get()
+            if item is None:
+                break
+
+            batch[:] = [item]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            self.commit_batch(conn, batch)
+            batch.clear()
+
+        conn.close()
+
+    def fail_pending(self, batch):
+        """
+        Runs when the writer thread exits, normally or not: every unit it will never get to
+        (including a group interrupted by an unexpected error) fails instead of leaving
+        callers blocked on .result() forever.
+        """
+        with self.state_lock:
+            self.stopped = True
+            pending = list(batch)
+            while True:
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not None:
+                    pending.append(item)
+
+        error = sqlite3.OperationalError("The database writer has stopped.")
+        for _, future in pending:
+            if not future.done():
+                future.set_exception(error)
+
+    def commit_batch(self, conn, batch):
+        outcomes = []
+        own_range = None
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            # The write lock is held from here on, so every counter value up to COMMIT is ours
+            start = self.read_sequence(conn) if self.sequence_query else None
+            for work, future in batch:
+                conn.execute("SAVEPOINT unit")
+                try:
+                    if callable(work):
+                        result = work(conn)
+                    else:
+                        result = None
+                        for query, params in work:
+                            result = conn.execute(query, params).lastrowid
+                    conn.execute("RELEASE unit")
+                    outcomes.append((future, result, None))
+                except Exception as e:
+                    # Any failure inside a unit (including from a callable) only rolls back that unit
+                    conn.execute("ROLLBACK TO unit")
+                    conn.execute("RELEASE unit")
+                    outcomes.append((future, None, e))
+            if self.sequence_query:
+                end = self.read_sequence(conn)
+                if end > start:
+                    # Published before COMMIT, so a reader never sees these rows without the range
+                    own_range = (start + 1, end)
+                    with self.sequence_lock:
+                        self.own_sequences.append(own_range)
+            conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            if own_range is not None:
+                # Rolled back values can be handed out again to another connection
+                with self.sequence_lock:
+                    self.own_sequences.remove(own_range)
+            outcomes = [(future, None, e) for _, future in batch]
+
+        # Callers only hear back once the whole group is durable
+        for future, result, error in outcomes:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)